@@ -0,0 +1,116 @@
+"""
+Allocation check for the per-sample inference path.
+
+Runs the steps run_cctv_stream takes for every sample (freeze check, motion
+gate, ROI crop, downscale, colour conversion, hands.process, preview copy)
+under tracemalloc, and reports the largest transient Python / numpy
+allocation per sample.  Exits non-zero if any sample allocates more than
+--limit bytes in one go, i.e. if a frame-sized buffer is being allocated
+instead of reused.  MediaPipe's own C++ allocations are not traced.
+
+Usage:
+    python bench_allocations.py [--size 2560x1440] [--samples 50] [--limit 65536]
+    python bench_allocations.py --path clip.mp4 --roi 600 300 900 700
+
+tests/test_allocations.py runs the same check under pytest with a stub in
+place of MediaPipe.
+"""
+import argparse
+import sys
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from bench_inference import parse_resolution
+from capture import FreezeDetector, MotionGate
+from live import crop_roi, get_middle_knuckle_coords, initialize_mediapipe_hands
+
+
+def sample_frames(
+    path: Optional[str], size: Tuple[int, int], n: int
+) -> List[np.ndarray]:
+    if path is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+                for _ in range(min(n, 4))]
+    cap = cv2.VideoCapture(path)
+    frames: List[np.ndarray] = []
+    while len(frames) < n:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def measure(
+    frames: List[np.ndarray],
+    samples: int,
+    roi: Optional[Tuple[int, int, int, int]],
+    target_resolution: Optional[Tuple[int, int]],
+    hands: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Per-sample tracemalloc peaks of the inference path.  *hands* defaults to
+    a real MediaPipe Hands instance; anything with `process(rgb)` and
+    `close()` works (tests/test_allocations.py passes a stub).  It is closed
+    when done.
+    """
+    if hands is None:
+        hands, _ = initialize_mediapipe_hands(max_num_hands=1, model_complexity=0)
+    freeze, gate = FreezeDetector(), MotionGate(refresh_seconds=0.0)
+    overlay = np.empty_like(frames[0])
+
+    def one_sample(i: int) -> None:
+        frame = frames[i % len(frames)]
+        freeze.check(frame, float(i))
+        gate.check(crop_roi(frame, roi)[0], float(i))
+        get_middle_knuckle_coords(frame, hands, roi=roi, target_resolution=target_resolution)
+        np.copyto(overlay, frame)
+
+    for i in range(3):                     # warm-up: buffers get allocated here
+        one_sample(i)
+
+    peaks: List[int] = []
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            one_sample(i)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+        hands.close()
+    return {"frame_bytes": frames[0].nbytes, "peaks": np.asarray(peaks)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--path", default=None,
+                        help="Video file to take frames from (default: random frames).")
+    parser.add_argument("--size", type=parse_resolution, default=(2560, 1440),
+                        help="Random frame size as WIDTHxHEIGHT.")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=64 * 1024,
+                        help="Largest allowed transient allocation per sample (bytes).")
+    parser.add_argument("--roi", type=int, nargs=4, default=None,
+                        metavar=("X", "Y", "W", "H"))
+    parser.add_argument("--target-resolution", type=parse_resolution, default=None)
+    args = parser.parse_args()
+
+    frames = sample_frames(args.path, args.size, args.samples)
+    result = measure(frames, args.samples, tuple(args.roi) if args.roi else None,
+                     args.target_resolution)
+    peaks = result["peaks"]
+    print(f"frame size {result['frame_bytes'] / 1e6:.1f} MB  |  per-sample peak "
+          f"allocation: median {np.median(peaks) / 1024:.1f} KiB, "
+          f"max {peaks.max() / 1024:.1f} KiB over {len(peaks)} samples")
+    if peaks.max() > args.limit:
+        print(f"FAIL: a sample allocated {peaks.max()} bytes (limit {args.limit}).")
+        sys.exit(1)
+    print("OK: no large allocations per sample.")
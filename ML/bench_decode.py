@@ -0,0 +1,239 @@
+"""
+Decode-cost benchmark for the capture modes and backends used by run_cctv_stream.
+
+Replays a local video file as fast as possible and measures the CPU time
+(all decoder threads included) spent pulling frames, so the numbers
+translate directly into "CPU seconds per camera-second" for sizing.
+
+Usage:
+    python bench_decode.py clip.mp4 [--seconds 60] [--sample-interval 0.4]
+    python bench_decode.py clip.mp4 --suite backends [--threads 1 2 4 0]
+    python bench_decode.py clip.mp4 --suite keyframes
+"""
+import argparse
+import resource
+import time
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from capture import FFmpegRingWriter, open_capture, probe_stream_size
+from live import SAMPLE_INTERVAL
+
+
+def bench_read_all(path: str, max_frames: int) -> Dict[str, Any]:
+    """
+    Baseline: decode and convert every frame with cap.read().
+    """
+    cap = cv2.VideoCapture(path)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    frames = decoded = 0
+    while frames < max_frames:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        frames  += 1
+        decoded += 1
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    cap.release()
+    return {"mode": "read", "frames": frames, "decoded": decoded,
+            "cpu_s": cpu, "wall_s": wall}
+
+
+def bench_grab_retrieve(
+    path: str, max_frames: int, sample_interval: float
+) -> Dict[str, Any]:
+    """
+    grab() every frame, retrieve() only every *sample_interval* of media time.
+    """
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    every = max(1, int(round(fps * sample_interval)))
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    frames = decoded = 0
+    while frames < max_frames:
+        if not cap.grab():
+            break
+        if frames % every == 0:
+            ret, _ = cap.retrieve()
+            if not ret:
+                break
+            decoded += 1
+        frames += 1
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    cap.release()
+    return {"mode": "grab", "frames": frames, "decoded": decoded,
+            "cpu_s": cpu, "wall_s": wall}
+
+
+def probe_frames(path: str) -> float:
+    cap = cv2.VideoCapture(path)
+    n = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    return n
+
+
+def _children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def bench_backend(
+    path: str, backend: str, threads: Optional[int], max_frames: int
+) -> Dict[str, Any]:
+    """
+    Decode up to *max_frames* with cv2.VideoCapture on *backend*, recording
+    open latency, per-read latency and CPU time.
+    """
+    wall0 = time.perf_counter()
+    cap = open_capture(path, backend, decoder_threads=threads)
+    if not cap.isOpened():
+        return {"name": f"{backend}/t={threads or 'auto'}", "error": "cannot open"}
+    open_s = time.perf_counter() - wall0
+
+    read_s: List[float] = []
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    while len(read_s) < max_frames:
+        t0 = time.perf_counter()
+        ret, _ = cap.read()
+        if not ret:
+            break
+        read_s.append(time.perf_counter() - t0)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    cap.release()
+    return {"name": f"{backend}/t={threads or 'auto'}", "frames": len(read_s),
+            "open_s": open_s, "cpu_s": cpu, "wall_s": wall,
+            "read_ms": 1000 * np.asarray(read_s)}
+
+
+def bench_subprocess(
+    path: str, threads: Optional[int], max_frames: int
+) -> Dict[str, Any]:
+    """
+    Decode with an FFmpeg subprocess into a SharedFrameRing at native rate.
+    Per-frame latency is the gap between consecutive frames landing in the ring.
+    """
+    width, height = probe_stream_size(path)
+    writer = FFmpegRingWriter(path, width, height, decoder_threads=threads)
+    arrivals: List[float] = []
+
+    cpu0 = _children_cpu()
+    wall0 = time.perf_counter()
+    writer.start()
+    first: Optional[float] = None
+    seq = 0
+    while len(arrivals) < max_frames and not writer.ring.closed:
+        latest = writer.ring.latest_seq()
+        if latest > seq:
+            now = time.perf_counter()
+            if first is None:
+                first = now - wall0
+            arrivals.extend([now] * (latest - seq))
+            seq = latest
+        else:
+            time.sleep(0.0005)
+    wall = time.perf_counter() - wall0
+    writer.stop()
+    cpu = _children_cpu() - cpu0
+
+    gaps = np.diff(np.asarray([wall0] + arrivals)) * 1000
+    return {"name": f"subprocess/t={threads or 'auto'}", "frames": len(arrivals),
+            "open_s": first or 0.0, "cpu_s": cpu, "wall_s": wall, "read_ms": gaps}
+
+
+def bench_keyframes(
+    path: str, keyframes_only: bool, sample_interval: float, max_frames: int
+) -> Dict[str, Any]:
+    """
+    Run the "ffmpeg" capture mode decoder over the clip, either at
+    1 / sample_interval fps (all frames decoded) or with -skip_frame nokey,
+    and report the FFmpeg process's CPU time.
+    """
+    width, height = probe_stream_size(path)
+    writer = FFmpegRingWriter(
+        path, width, height, fps=1.0 / sample_interval, keyframes_only=keyframes_only
+    )
+    cpu0 = _children_cpu()
+    wall0 = time.perf_counter()
+    writer.start()
+    while not writer.ring.closed:
+        time.sleep(0.01)
+    frames = writer.ring.latest_seq()
+    wall = time.perf_counter() - wall0
+    writer.stop()
+    return {"mode": "keyframes" if keyframes_only else "all frames",
+            "frames": max_frames, "decoded": frames,
+            "cpu_s": _children_cpu() - cpu0, "wall_s": wall}
+
+
+def print_backend_report(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'backend':<20}{'frames':>8}{'open ms':>9}{'fps':>8}"
+          f"{'p50 ms':>8}{'p95 ms':>8}{'cpu ms/frame':>14}")
+    for r in rows:
+        if "error" in r:
+            print(f"{r['name']:<20}  {r['error']}")
+            continue
+        frames = max(r["frames"], 1)
+        p50, p95 = (np.percentile(r["read_ms"], [50, 95])
+                    if len(r["read_ms"]) else (float("nan"),) * 2)
+        print(f"{r['name']:<20}{r['frames']:>8}{1000 * r['open_s']:>9.1f}"
+              f"{r['frames'] / r['wall_s']:>8.1f}{p50:>8.2f}{p95:>8.2f}"
+              f"{1000 * r['cpu_s'] / frames:>14.2f}")
+
+
+def print_report(rows: List[Dict[str, Any]], fps: float) -> None:
+    base_cpu = rows[0]["cpu_s"]
+    print(f"{'mode':<10}{'frames':>8}{'decoded':>9}{'cpu ms/frame':>14}"
+          f"{'cpu s / cam-s':>15}{'saved':>8}")
+    for r in rows:
+        media_s = r["frames"] / fps if fps else float("nan")
+        per_cam = r["cpu_s"] / media_s if media_s else float("nan")
+        saved   = 1.0 - r["cpu_s"] / base_cpu if base_cpu > 0 else 0.0
+        print(f"{r['mode']:<10}{r['frames']:>8}{r['decoded']:>9}"
+              f"{1000 * r['cpu_s'] / max(r['frames'], 1):>14.2f}"
+              f"{per_cam:>15.3f}{saved:>8.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="Local video file (e.g. an exported Dahua clip).")
+    parser.add_argument("--seconds", type=float, default=60.0,
+                        help="Seconds of media to decode per mode.")
+    parser.add_argument("--sample-interval", type=float, default=SAMPLE_INTERVAL)
+    parser.add_argument("--suite", choices=("modes", "backends", "keyframes"),
+                        default="modes",
+                        help="modes: read vs grab/retrieve; backends: decoder "
+                             "backends × thread counts; keyframes: full vs "
+                             "keyframe-only FFmpeg decoding.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 0],
+                        help="Decoder thread counts for --suite backends (0 = auto).")
+    args = parser.parse_args()
+
+    probe = cv2.VideoCapture(args.path)
+    fps = probe.get(cv2.CAP_PROP_FPS) or 30.0
+    probe.release()
+    max_frames = int(args.seconds * fps)
+
+    if args.suite == "backends":
+        rows = []
+        for n in args.threads:
+            threads = n or None
+            rows.append(bench_backend(args.path, "ffmpeg", threads, max_frames))
+            rows.append(bench_backend(args.path, "gstreamer", threads, max_frames))
+            rows.append(bench_subprocess(args.path, threads, max_frames))
+        print_backend_report(rows)
+    elif args.suite == "keyframes":
+        # The FFmpeg subprocess always decodes the whole clip; report per
+        # media second of the full file.
+        total = int(probe_frames(args.path))
+        print_report([
+            bench_keyframes(args.path, False, args.sample_interval, total),
+            bench_keyframes(args.path, True, args.sample_interval, total),
+        ], fps)
+    else:
+        print_report([
+            bench_read_all(args.path, max_frames),
+            bench_grab_retrieve(args.path, max_frames, args.sample_interval),
+        ], fps)
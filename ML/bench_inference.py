@@ -0,0 +1,130 @@
+"""
+Accuracy-versus-latency benchmark for inference downscaling (target_resolution).
+
+Samples frames from a local video file, runs get_middle_knuckle_coords on each
+at native resolution and at every requested target resolution, and reports
+per-call latency next to the knuckle's deviation (in native pixels) from the
+native-resolution result.
+
+Usage:
+    python bench_inference.py clip.mp4 [--frames 200] [--sample-interval 0.4]
+    python bench_inference.py clip.mp4 --resolutions 1280x720 640x360 --roi 600 300 900 700
+"""
+import argparse
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from live import (
+    SAMPLE_INTERVAL,
+    get_middle_knuckle_coords,
+    initialize_mediapipe_hands,
+)
+from offline import iter_file_samples
+
+
+def load_samples(path: str, n_frames: int, sample_interval: float) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video file: {path!r}.")
+    frames: List[np.ndarray] = []
+    try:
+        for _, frame in iter_file_samples(cap, sample_interval):
+            frames.append(frame)
+            if len(frames) >= n_frames:
+                break
+    finally:
+        cap.release()
+    return frames
+
+
+def bench_resolution(
+    frames: List[np.ndarray],
+    target_resolution: Optional[Tuple[int, int]],
+    roi: Optional[Tuple[int, int, int, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Run every frame through get_middle_knuckle_coords at *target_resolution*.
+
+    Palm detection runs on every frame (static_image_mode=True) so each
+    resolution sees the same, independent inference problem.
+    """
+    hands, _ = initialize_mediapipe_hands(
+        max_num_hands=1, model_complexity=0, static_image_mode=True
+    )
+    coords: List[Optional[Tuple[float, float]]] = []
+    latency_ms: List[float] = []
+    try:
+        for frame in frames:
+            t0 = time.perf_counter()
+            coords.append(get_middle_knuckle_coords(
+                frame, hands, roi=roi, target_resolution=target_resolution
+            ))
+            latency_ms.append(1000 * (time.perf_counter() - t0))
+    finally:
+        hands.close()
+    name = "native" if target_resolution is None else "{}x{}".format(*target_resolution)
+    return {"name": name, "coords": coords, "latency_ms": np.asarray(latency_ms)}
+
+
+def compare(reference: Dict[str, Any], row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Knuckle deviation from the native run, over frames where both detected a
+    hand, plus how often the two runs disagree on whether a hand is present.
+    """
+    errors = [
+        np.hypot(c[0] - r[0], c[1] - r[1])
+        for r, c in zip(reference["coords"], row["coords"])
+        if r is not None and c is not None
+    ]
+    disagree = sum(
+        (r is None) != (c is None) for r, c in zip(reference["coords"], row["coords"])
+    )
+    return {
+        "detected":  sum(c is not None for c in row["coords"]),
+        "disagree":  disagree,
+        "err_p50":   float(np.percentile(errors, 50)) if errors else float("nan"),
+        "err_p95":   float(np.percentile(errors, 95)) if errors else float("nan"),
+    }
+
+
+def print_report(rows: List[Dict[str, Any]], n_frames: int) -> None:
+    reference = rows[0]
+    print(f"{'resolution':<12}{'p50 ms':>8}{'p95 ms':>8}{'hands':>8}"
+          f"{'disagree':>10}{'err p50 px':>12}{'err p95 px':>12}")
+    for r in rows:
+        acc = compare(reference, r)
+        p50, p95 = np.percentile(r["latency_ms"], [50, 95])
+        print(f"{r['name']:<12}{p50:>8.2f}{p95:>8.2f}"
+              f"{acc['detected']:>5}/{n_frames:<3}{acc['disagree']:>9}"
+              f"{acc['err_p50']:>12.2f}{acc['err_p95']:>12.2f}")
+
+
+def parse_resolution(text: str) -> Tuple[int, int]:
+    """argparse type for WIDTHxHEIGHT, e.g. "640x360" → (640, 360)."""
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="Local video file (e.g. an exported Dahua clip).")
+    parser.add_argument("--frames", type=int, default=200,
+                        help="Number of sampled frames to run per resolution.")
+    parser.add_argument("--sample-interval", type=float, default=SAMPLE_INTERVAL)
+    parser.add_argument("--resolutions", type=parse_resolution, nargs="+",
+                        default=[(1920, 1080), (1280, 720), (960, 540),
+                                 (640, 360), (320, 180)],
+                        help="Target resolutions as WIDTHxHEIGHT.")
+    parser.add_argument("--roi", type=int, nargs=4, default=None,
+                        metavar=("X", "Y", "W", "H"),
+                        help="Workstation region in native pixels.")
+    args = parser.parse_args()
+
+    samples = load_samples(args.path, args.frames, args.sample_interval)
+    roi = tuple(args.roi) if args.roi else None
+    results = [bench_resolution(samples, None, roi)]
+    results += [bench_resolution(samples, res, roi) for res in args.resolutions]
+    print_report(results, len(samples))
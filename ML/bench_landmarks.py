@@ -0,0 +1,80 @@
+"""
+Latency and throughput benchmark for landmark providers.
+
+Runs each LandmarkProvider over the same sampled frames from a local video
+file, one frame at a time (per-frame latency percentiles) and through
+process_batch (throughput).  The replay provider is fed the MediaPipe
+results from the first pass, so it returns the same detections at the cost
+of the pipeline alone.
+
+Usage:
+    python bench_landmarks.py clip.mp4 [--frames 200] [--batch 8]
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from bench_inference import load_samples
+from landmarks import LandmarkProvider, MediaPipeHandsProvider, ReplayProvider
+from live import SAMPLE_INTERVAL
+
+
+def bench_provider(
+    provider: LandmarkProvider, frames: List[np.ndarray], batch: int
+) -> Dict[str, Any]:
+    latency_ms: List[float] = []
+    detections = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        detections.append(provider.process(frame))
+        latency_ms.append(1000 * (time.perf_counter() - t0))
+
+    t0 = time.perf_counter()
+    for i in range(0, len(frames), batch):
+        provider.process_batch(frames[i:i + batch])
+    batch_s = time.perf_counter() - t0
+
+    return {
+        "name":       provider.name,
+        "latency_ms": np.asarray(latency_ms),
+        "fps":        len(frames) / (sum(latency_ms) / 1000) if latency_ms else 0.0,
+        "batch_fps":  len(frames) / batch_s if batch_s else 0.0,
+        "detected":   sum(d is not None for d in detections),
+        "detections": detections,
+    }
+
+
+def print_report(rows: List[Dict[str, Any]], n_frames: int) -> None:
+    print(f"{'provider':<16}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}"
+          f"{'fps':>9}{'batch fps':>11}{'hands':>9}")
+    for r in rows:
+        p50, p95, p99 = np.percentile(r["latency_ms"], [50, 95, 99])
+        print(f"{r['name']:<16}{p50:>8.2f}{p95:>8.2f}{p99:>8.2f}"
+              f"{r['fps']:>9.1f}{r['batch_fps']:>11.1f}"
+              f"{r['detected']:>5}/{n_frames}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="Local video file (e.g. an exported Dahua clip).")
+    parser.add_argument("--frames", type=int, default=200,
+                        help="Number of sampled frames to run per provider.")
+    parser.add_argument("--batch", type=int, default=8,
+                        help="Frames per process_batch call.")
+    parser.add_argument("--sample-interval", type=float, default=SAMPLE_INTERVAL)
+    args = parser.parse_args()
+
+    samples = load_samples(args.path, args.frames, args.sample_interval)
+    factories: List[Callable[[], LandmarkProvider]] = [
+        lambda: MediaPipeHandsProvider(model_complexity=0),
+        lambda: MediaPipeHandsProvider(model_complexity=1),
+    ]
+    results = []
+    for factory in factories:
+        with factory() as provider:
+            results.append(bench_provider(provider, samples, args.batch))
+    with ReplayProvider(results[0]["detections"]) as replay:
+        results.append(bench_provider(replay, samples, args.batch))
+    print_report(results, len(samples))
@@ -0,0 +1,131 @@
+"""
+Cameras-per-core benchmark: one MediaPipe graph per camera versus one
+MosaicBatcher call for all cameras (and, with --tflite, one batched
+TFLiteHandsProvider call).
+
+Simulates N cameras by sampling frames from a local video file at N
+different offsets, then times rounds of detection both ways.  CPU time is
+process-wide (MediaPipe's worker threads included); "cams/core" is how many
+cameras one fully busy core could keep at --sample-interval.  "recall" is
+hands found relative to one graph per camera on the same frames; run it on
+footage with hands at the workstation before enabling the mosaic.
+
+Usage:
+    python bench_mosaic.py clip.mp4 [--cameras 1 2 4 8] [--rounds 50]
+    python bench_mosaic.py clip.mp4 --roi 600 300 900 700 --tile 320x240
+    python bench_mosaic.py clip.mp4 --tflite      # needs a TFLite interpreter
+"""
+import argparse
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bench_inference import load_samples, parse_resolution
+from live import SAMPLE_INTERVAL, get_knuckle_and_hand_extent, initialize_mediapipe_hands
+from mosaic import MOSAIC_TILE_SIZE, MosaicBatcher
+
+
+def camera_frames(
+    samples: List[np.ndarray], n_cameras: int, rounds: int
+) -> List[List[np.ndarray]]:
+    """rounds × n_cameras frames; camera k starts k / n of the way into the clip."""
+    stride = max(1, len(samples) // n_cameras)
+    return [
+        [samples[(r + k * stride) % len(samples)] for k in range(n_cameras)]
+        for r in range(rounds)
+    ]
+
+
+def bench_per_camera(
+    rounds: List[List[np.ndarray]], roi: Optional[Tuple[int, int, int, int]]
+) -> Dict[str, Any]:
+    n = len(rounds[0])
+    graphs = [initialize_mediapipe_hands(max_num_hands=1)[0] for _ in range(n)]
+    detected = 0
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for frames in rounds:
+        for hands, frame in zip(graphs, frames):
+            detected += get_knuckle_and_hand_extent(frame, hands, roi=roi) is not None
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    for hands in graphs:
+        hands.close()
+    return {"mode": "per-camera", "cpu_s": cpu, "wall_s": wall, "detected": detected}
+
+
+def bench_mosaic(
+    rounds: List[List[np.ndarray]],
+    roi: Optional[Tuple[int, int, int, int]],
+    tile_size: Tuple[int, int],
+) -> Dict[str, Any]:
+    n = len(rounds[0])
+    batcher = MosaicBatcher(n, tile_size=tile_size)
+    detected = 0
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for frames in rounds:
+        detected += sum(d is not None for d in batcher.process(frames, [roi] * n))
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    batcher.close()
+    return {"mode": "mosaic", "cpu_s": cpu, "wall_s": wall, "detected": detected}
+
+
+def bench_tflite(
+    rounds: List[List[np.ndarray]], roi: Optional[Tuple[int, int, int, int]]
+) -> Dict[str, Any]:
+    # Optional backend: only --tflite needs ai_edge_litert / tflite_runtime
+    from tflite_hands import TFLiteHandsProvider
+
+    n = len(rounds[0])
+    provider = TFLiteHandsProvider(model_complexity=0)
+    detected = 0
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for frames in rounds:
+        detected += sum(d is not None for d in provider.process_batch(frames, [roi] * n))
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    provider.close()
+    return {"mode": "tflite", "cpu_s": cpu, "wall_s": wall, "detected": detected}
+
+
+def print_report(rows: List[Dict[str, Any]], sample_interval: float) -> None:
+    baseline = {r["cameras"]: r["detected"] for r in rows if r["mode"] == "per-camera"}
+    print(f"{'cameras':>8}  {'mode':<11}{'ms/round':>10}{'cpu ms/cam':>12}"
+          f"{'cams/core':>11}{'hands':>10}{'recall':>8}")
+    for r in rows:
+        samples = r["rounds"] * r["cameras"]
+        cpu_per_cam = r["cpu_s"] / samples
+        base = baseline.get(r["cameras"])
+        recall = f"{100 * r['detected'] / base:.0f}%" if base else "-"
+        print(f"{r['cameras']:>8}  {r['mode']:<11}"
+              f"{1000 * r['wall_s'] / r['rounds']:>10.1f}"
+              f"{1000 * cpu_per_cam:>12.2f}"
+              f"{sample_interval / cpu_per_cam if cpu_per_cam else float('inf'):>11.1f}"
+              f"{r['detected']:>6}/{samples}{recall:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="Local video file (e.g. an exported Dahua clip).")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--sample-interval", type=float, default=SAMPLE_INTERVAL)
+    parser.add_argument("--tile", type=parse_resolution, default=MOSAIC_TILE_SIZE,
+                        help="Mosaic tile size as WIDTHxHEIGHT.")
+    parser.add_argument("--roi", type=int, nargs=4, default=None,
+                        metavar=("X", "Y", "W", "H"),
+                        help="Workstation region in native pixels (all cameras).")
+    parser.add_argument("--tflite", action="store_true",
+                        help="Also run the batched TFLite backend.")
+    args = parser.parse_args()
+
+    samples = load_samples(args.path, max(args.rounds, 100), args.sample_interval)
+    roi = tuple(args.roi) if args.roi else None
+    results = []
+    for n in args.cameras:
+        rounds = camera_frames(samples, n, args.rounds)
+        rows = [bench_per_camera(rounds, roi), bench_mosaic(rounds, roi, args.tile)]
+        if args.tflite:
+            rows.append(bench_tflite(rounds, roi))
+        for row in rows:
+            row.update(cameras=n, rounds=len(rounds))
+            results.append(row)
+    print_report(results, args.sample_interval)
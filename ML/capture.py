@@ -0,0 +1,1204 @@
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from multiprocessing import shared_memory
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class PtsClock:
+    """
+    Maps stream presentation timestamps (seconds) onto the wall clock.
+
+    The first frame anchors pts to time.time(); later frames keep the
+    stream's own spacing, so decode latency and jitter do not leak into the
+    sample times and a buffered backlog still yields correct velocities.
+    Sources without usable pts (negative, or stuck on one value as some
+    webcams report) fall back to wall-clock time.
+    """
+    def __init__(self, max_stalls: int = 10):
+        self.max_stalls = max_stalls
+        self.fallback: bool = False
+        self._offset: Optional[float] = None
+        self._last_pts: Optional[float] = None
+        self._last_stamp: Optional[float] = None
+        self._stalls: int = 0
+
+    def reset(self) -> None:
+        """
+        Forget the pts anchor, e.g. after switching to a different stream.
+        Stamps stay monotonic across the reset.
+        """
+        self._offset   = None
+        self._last_pts = None
+        self._stalls   = 0
+
+    def stamp(self, pts: Optional[float], wall: float) -> float:
+        if self.fallback or pts is None or pts < 0:
+            return wall
+
+        if self._last_pts is not None and pts == self._last_pts:
+            self._stalls += 1
+            if self._stalls >= self.max_stalls:
+                self.fallback = True
+                return wall
+        else:
+            self._stalls = 0
+
+        if self._offset is None or (self._last_pts is not None and pts < self._last_pts):
+            # First frame, or the stream restarted: never step back in time
+            anchor = wall if self._last_stamp is None else max(wall, self._last_stamp)
+            self._offset = anchor - pts
+        self._last_pts   = pts
+        self._last_stamp = self._offset + pts
+        return self._last_stamp
+
+
+def capture_pts(cap: cv2.VideoCapture) -> float:
+    """
+    Presentation time (s) of the frame last grabbed from *cap*.
+    """
+    return cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+
+CAPTURE_BACKENDS = ("auto", "ffmpeg", "gstreamer")
+
+# OPENCV_FFMPEG_CAPTURE_OPTIONS is process-wide and cameras open (and
+# reconnect) on their own threads, so set / open / restore must not interleave
+_ffmpeg_options_lock = threading.Lock()
+
+
+def gstreamer_pipeline(
+    source: str,
+    decoder_threads: Optional[int] = None,
+    rtsp_transport: str = "tcp",
+    codec: str = "h264",
+) -> str:
+    """
+    Build an appsink pipeline string for cv2.VideoCapture(..., cv2.CAP_GSTREAMER).
+
+    Args:
+        source (str): RTSP URL or local MP4 file path.
+        decoder_threads (Optional[int]): max-threads for the libav decoder
+                                         (None = GStreamer default).
+        rtsp_transport (str): "tcp" or "udp".
+        codec (str): "h264" or "h265" (Dahua main streams are often H.265).
+    """
+    threads = f" max-threads={decoder_threads}" if decoder_threads else ""
+    if str(source).startswith("rtsp://"):
+        head = (
+            f'rtspsrc location="{source}" protocols={rtsp_transport} latency=0 '
+            f"! rtp{codec}depay ! {codec}parse"
+        )
+    else:
+        head = f'filesrc location="{source}" ! qtdemux ! {codec}parse'
+    return (
+        f"{head} ! avdec_{codec}{threads} ! videoconvert "
+        "! video/x-raw,format=BGR ! appsink drop=true max-buffers=2 sync=false"
+    )
+
+
+def open_capture(
+    source: Any,
+    backend: str = "auto",
+    decoder_threads: Optional[int] = None,
+    rtsp_transport: str = "tcp",
+    codec: str = "h264",
+) -> cv2.VideoCapture:
+    """
+    Open *source* with an explicit OpenCV capture backend.
+
+    Args:
+        source (Any): Camera index, RTSP URL or file path.
+        backend (str): "auto" (OpenCV's choice, default options), "ffmpeg"
+                       or "gstreamer".  The raw-subprocess option is
+                       FFmpegRingWriter, which does not use cv2.VideoCapture.
+        decoder_threads (Optional[int]): Decoder thread count (None = backend
+                                         default, usually one per core).
+        rtsp_transport (str): "tcp" (robust) or "udp" (lower latency, lossy).
+        codec (str): Stream codec, only needed to build GStreamer pipelines.
+
+    Raises:
+        ValueError: If *backend* is not one of CAPTURE_BACKENDS.
+    """
+    if backend not in CAPTURE_BACKENDS:
+        raise ValueError(
+            f"Unknown capture backend {backend!r}; expected one of {CAPTURE_BACKENDS}."
+        )
+    if backend == "auto" or isinstance(source, int):
+        return cv2.VideoCapture(source)
+
+    if backend == "gstreamer":
+        pipeline = gstreamer_pipeline(source, decoder_threads, rtsp_transport, codec)
+        return cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+
+    params: List[int] = []
+    if decoder_threads and hasattr(cv2, "CAP_PROP_N_THREADS"):   # OpenCV >= 4.6
+        params = [cv2.CAP_PROP_N_THREADS, decoder_threads]
+    # FFmpeg demuxer options are read from the environment at open time
+    key = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+    with _ffmpeg_options_lock:
+        previous = os.environ.get(key)
+        if str(source).startswith("rtsp://"):
+            os.environ[key] = f"rtsp_transport;{rtsp_transport}"
+        try:
+            return cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+        finally:
+            if previous is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = previous
+
+
+class LatestFrameGrabber:
+    """
+    Background reader that keeps draining a cv2.VideoCapture and holds only
+    the newest decoded frame together with its capture timestamp.
+
+    When inference is slower than the camera frame rate, the FFmpeg buffer
+    inside OpenCV backs up and every `cap.read()` returns an older frame.
+    Running the reads on a dedicated thread keeps that buffer empty; frames
+    that are overwritten before the consumer picks them up are counted in
+    `frames_dropped`.
+
+    With a PtsClock the timestamp is the frame's presentation time mapped to
+    the wall clock; without one it is time.time() at decode.
+    """
+    def __init__(self, cap: cv2.VideoCapture, clock: Optional[PtsClock] = None):
+        self.cap   = cap
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._timestamp: float = 0.0
+        self._seq: int = 0              # sequence number of the held frame
+        self._consumed_seq: int = 0     # last sequence number handed out
+        self._ended: bool = False
+        self._running: bool = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.frames_read: int    = 0
+        self.frames_dropped: int = 0
+
+    def start(self) -> "LatestFrameGrabber":
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="LatestFrameGrabber", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while self._running:
+            ret, frame = self.cap.read()
+            captured_at = time.time()
+            if ret and self.clock is not None:
+                captured_at = self.clock.stamp(capture_pts(self.cap), captured_at)
+
+            with self._cond:
+                if not ret:
+                    self._ended = True
+                    self._cond.notify_all()
+                    return
+
+                if self._seq != self._consumed_seq:
+                    self.frames_dropped += 1   # previous frame never consumed
+                self._frame     = frame
+                self._timestamp = captured_at
+                self._seq      += 1
+                self.frames_read += 1
+                self._cond.notify_all()
+
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+
+    def read(
+        self, timeout: Optional[float] = None
+    ) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Return the newest frame that has not been returned before.
+
+        Blocks until the reader thread delivers a fresh frame, so the caller
+        never processes the same (stale) frame twice.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait for a fresh
+                                       frame (None = wait indefinitely).
+
+        Returns:
+            Tuple[bool, Optional[np.ndarray], float]:
+                - ok: False if the stream ended or the wait timed out.
+                - frame: The BGR frame (do not keep it past the next read).
+                - captured_at: Frame timestamp (see class docstring).
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq != self._consumed_seq or self._ended,
+                timeout,
+            )
+            if self._seq == self._consumed_seq:
+                return False, None, 0.0
+
+            self._consumed_seq = self._seq
+            return True, self._frame, self._timestamp
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of BGR frames in `multiprocessing.shared_memory`.
+
+    One writer (FFmpegRingWriter) fills the slots in turn; any number of
+    inference processes attach by name and read the frames as numpy views
+    without copying.  Layout of the shared block:
+
+        [int64 write_seq][int64 closed][slots × int64 seq][slots × float64 t]
+        [slots × height × width × 3 uint8 frames]
+
+    A slot's seq is -1 while it is being written, so a reader can tell a torn
+    frame from a complete one.  A frame stays valid until the writer wraps
+    around to its slot again (slots - 1 frames later).
+    """
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        slots: int = 8,
+        name: Optional[str] = None,
+        create: bool = True,
+    ):
+        self.width       = width
+        self.height      = height
+        self.slots       = slots
+        self.frame_bytes = width * height * 3
+        self._meta_bytes = 16 + slots * 16
+
+        size = self._meta_bytes + slots * self.frame_bytes
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._owner = create
+
+        buf = self.shm.buf
+        self._header    = np.ndarray((2,), np.int64, buf, 0)
+        self._slot_seq  = np.ndarray((slots,), np.int64, buf, 16)
+        self._slot_time = np.ndarray((slots,), np.float64, buf, 16 + 8 * slots)
+        self._frames    = np.ndarray(
+            (slots, height, width, 3), np.uint8, buf, self._meta_bytes
+        )
+        if create:
+            self._header[:]   = 0
+            self._slot_seq[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def attach(cls, name: str, width: int, height: int, slots: int = 8) -> "SharedFrameRing":
+        """
+        Open an existing ring created by another process.
+        """
+        return cls(width, height, slots, name=name, create=False)
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header[1])
+
+    def mark_closed(self) -> None:
+        self._header[1] = 1
+
+    def latest_seq(self) -> int:
+        return int(self._header[0])
+
+    def write_from(
+        self, stream: Any, stamp: Optional[Callable[[int], float]] = None
+    ) -> bool:
+        """
+        Read exactly one raw BGR frame from *stream* straight into the next slot.
+
+        Args:
+            stream (Any): Unbuffered binary stream (e.g. a Popen stdout).
+            stamp (Optional[Callable[[int], float]]): Maps the frame's sequence
+                number to its timestamp (default: time.time() on arrival).
+
+        Returns:
+            bool: False if the stream ended before a full frame was read.
+        """
+        seq  = self.latest_seq() + 1
+        slot = seq % self.slots
+        view = memoryview(self._frames[slot]).cast("B")
+
+        self._slot_seq[slot] = -1
+        got = 0
+        while got < self.frame_bytes:
+            n = stream.readinto(view[got:])
+            if not n:
+                view.release()
+                return False
+            got += n
+        view.release()
+
+        self._slot_time[slot] = stamp(seq) if stamp is not None else time.time()
+        self._slot_seq[slot]  = seq
+        self._header[0]       = seq
+        return True
+
+    def get(self, seq: int) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Return a read-only view of frame *seq* and its capture time, or None if
+        the slot has already been overwritten.
+        """
+        slot = seq % self.slots
+        if self._slot_seq[slot] != seq:
+            return None
+        frame = self._frames[slot].view()
+        frame.flags.writeable = False
+        return frame, float(self._slot_time[slot])
+
+    def is_current(self, seq: int) -> bool:
+        """
+        True while frame *seq* has not been overwritten (check after use).
+        """
+        return bool(self._slot_seq[seq % self.slots] == seq)
+
+    def close(self) -> None:
+        # Views into the buffer must be gone before SharedMemory.close().
+        self._header = self._slot_seq = self._slot_time = self._frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass    # a caller still holds a frame view; mapping goes with it
+        if self._owner:
+            self.shm.unlink()
+
+
+def probe_stream_size(source: str, ffprobe_bin: str = "ffprobe") -> Tuple[int, int]:
+    """
+    Ask ffprobe for the (width, height) of the first video stream in *source*.
+    """
+    cmd = [ffprobe_bin, "-v", "error"]
+    if str(source).startswith("rtsp://"):
+        cmd += ["-rtsp_transport", "tcp"]
+    cmd += ["-select_streams", "v:0", "-show_entries", "stream=width,height",
+            "-of", "csv=p=0", str(source)]
+    out = subprocess.run(
+        cmd, capture_output=True, text=True, check=True, timeout=15,
+    ).stdout
+    width, height = out.strip().splitlines()[0].split(",")[:2]
+    return int(width), int(height)
+
+
+@lru_cache(maxsize=None)
+def ffmpeg_version(ffmpeg_bin: str = "ffmpeg") -> Optional[Tuple[int, int]]:
+    """
+    (major, minor) release of *ffmpeg_bin*, or None when it cannot be run or
+    reports no release number (git snapshot builds, which are recent).
+    """
+    try:
+        out = subprocess.run(
+            [ffmpeg_bin, "-hide_banner", "-version"],
+            capture_output=True, text=True, timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r"version n?(\d+)\.(\d+)", out)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+class FFmpegRingWriter:
+    """
+    Runs FFmpeg as a subprocess that decodes *source* to raw BGR at the
+    requested fps / resolution and pumps the frames into a SharedFrameRing.
+
+    Rate and size are applied by FFmpeg filters, so frames that would never
+    be sampled are dropped inside the decoder and never reach numpy.
+
+    Raw video on a pipe carries no timestamps, but the fps filter emits frame
+    n at pts n / fps; with a PtsClock that pts is what goes into the ring.
+
+    With *keyframes_only* the decoder is told to skip every non-key frame
+    (`-skip_frame nokey`), so only one frame per GOP is decoded.  The fps
+    filter is dropped in that mode (it would duplicate keyframes to fill the
+    rate) and frames are stamped on arrival.
+
+    Network sources get a socket I/O timeout of *io_timeout* seconds, so a
+    camera that stops sending without closing the connection ends FFmpeg
+    (and the ring) instead of leaving it waiting forever.
+
+    FFmpeg's error output is printed with an [FFMPEG] prefix, and the
+    last line is kept in `last_error`.
+    """
+    def __init__(
+        self,
+        source: str,
+        width: int,
+        height: int,
+        fps: Optional[float] = None,
+        slots: int = 8,
+        rtsp_transport: str = "tcp",
+        ffmpeg_bin: str = "ffmpeg",
+        clock: Optional[PtsClock] = None,
+        decoder_threads: Optional[int] = None,
+        keyframes_only: bool = False,
+        io_timeout: float = 10.0,
+    ):
+        self.source          = source
+        self.io_timeout      = io_timeout
+        self.keyframes_only  = keyframes_only
+        self.fps             = fps
+        self.clock           = clock
+        self.decoder_threads = decoder_threads
+        self.rtsp_transport  = rtsp_transport
+        self.ffmpeg_bin     = ffmpeg_bin
+        self.ring           = SharedFrameRing(width, height, slots)
+
+        self.last_error: Optional[str] = None
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._log_thread: Optional[threading.Thread] = None
+
+    def command(self) -> List[str]:
+        filters = []
+        if self.fps and not self.keyframes_only:
+            filters.append(f"fps={self.fps:g}")
+        filters.append(f"scale={self.ring.width}:{self.ring.height}")
+
+        # None: a git build (recent) or not installed (start() reports it)
+        version = ffmpeg_version(self.ffmpeg_bin) or (99, 0)
+        cmd = [self.ffmpeg_bin, "-hide_banner", "-loglevel", "error", "-nostdin"]
+        timeout_us = str(int(self.io_timeout * 1e6))
+        if str(self.source).startswith("rtsp://"):
+            cmd += ["-rtsp_transport", self.rtsp_transport]
+            # The RTSP demuxer's socket timeout was -stimeout before FFmpeg 5
+            cmd += ["-timeout" if version >= (5, 0) else "-stimeout", timeout_us]
+        elif "://" in str(self.source):
+            cmd += ["-rw_timeout", timeout_us]
+        if self.decoder_threads:
+            cmd += ["-threads", str(self.decoder_threads)]   # decoder option
+        if self.keyframes_only:
+            cmd += ["-skip_frame", "nokey"]                  # decoder option
+        cmd += [
+            "-i", str(self.source),
+            "-an", "-vf", ",".join(filters),
+        ]
+        if self.keyframes_only:
+            # -fps_mode replaced -vsync in FFmpeg 5.1
+            cmd += ["-fps_mode" if version >= (5, 1) else "-vsync", "passthrough"]
+        cmd += ["-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+        return cmd
+
+    def start(self) -> "FFmpegRingWriter":
+        """
+        Raises:
+            RuntimeError: If FFmpeg cannot be started (e.g. not installed);
+                          the shared-memory ring is released first.
+        """
+        try:
+            self._proc = subprocess.Popen(
+                self.command(), stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, bufsize=0,
+            )
+        except (OSError, ValueError) as exc:
+            self.ring.close()
+            raise RuntimeError(f"Cannot start {self.ffmpeg_bin!r}: {exc}") from exc
+        self._thread = threading.Thread(
+            target=self._run, name="FFmpegRingWriter", daemon=True
+        )
+        self._thread.start()
+        self._log_thread = threading.Thread(
+            target=self._log_stderr, name="FFmpegRingWriter-log", daemon=True
+        )
+        self._log_thread.start()
+        return self
+
+    def _log_stderr(self) -> None:
+        # -loglevel error keeps this to real problems (auth, 404, codec)
+        for raw in iter(self._proc.stderr.readline, b""):
+            line = raw.decode(errors="replace").rstrip()
+            if line:
+                self.last_error = line
+                print(f"[FFMPEG] {line}")
+
+    def _run(self) -> None:
+        stamp = None
+        if self.clock is not None and self.fps and not self.keyframes_only:
+            stamp = lambda seq: self.clock.stamp((seq - 1) / self.fps, time.time())
+        while self.ring.write_from(self._proc.stdout, stamp):
+            pass
+        self.ring.mark_closed()
+
+    def stop(self) -> None:
+        if self._proc is not None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        if self._log_thread is not None:
+            self._log_thread.join(timeout=2.0)
+        self._proc = self._thread = self._log_thread = None
+        self.ring.close()
+
+
+class RingFrameReader:
+    """
+    Consumer side of a SharedFrameRing with the same `read()` contract as
+    LatestFrameGrabber: each call returns the newest frame not yet seen.
+    """
+    def __init__(self, ring: SharedFrameRing, poll_interval: float = 0.005):
+        self.ring          = ring
+        self.poll_interval = poll_interval
+        self.last_seq: int = ring.latest_seq()
+
+        self.frames_read: int    = 0
+        self.frames_dropped: int = 0
+
+    def read(
+        self, timeout: Optional[float] = None
+    ) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Returns:
+            Tuple[bool, Optional[np.ndarray], float]: (ok, read-only frame view,
+            capture time).  ok is False once the writer closed the ring or the
+            wait timed out.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            seq = self.ring.latest_seq()
+            if seq > self.last_seq:
+                got = self.ring.get(seq)
+                if got is not None:
+                    self.frames_dropped += seq - self.last_seq - 1
+                    self.frames_read    += 1
+                    self.last_seq        = seq
+                    return True, got[0], got[1]
+            elif self.ring.closed:
+                return False, None, 0.0
+            if deadline is not None and time.time() >= deadline:
+                return False, None, 0.0
+            time.sleep(self.poll_interval)
+
+    def stop(self) -> None:
+        pass
+
+
+CAPTURE_MODES = ("direct", "latest", "grab", "ffmpeg")
+
+
+class FrameSource:
+    """
+    One camera's frames behind a single `read()` call, whatever the capture
+    mode, so the sampling loop can close and reopen the stream (reconnect,
+    main/sub switching) without knowing how frames are produced.
+
+    Modes (see run_cctv_stream): "direct", "latest", "grab", "ffmpeg".
+    """
+    def __init__(
+        self,
+        source: Any,
+        capture_mode: str = "direct",
+        backend: str = "auto",
+        decoder_threads: Optional[int] = None,
+        rtsp_transport: str = "tcp",
+        decode_size: Optional[Tuple[int, int]] = None,
+        decode_fps: Optional[float] = None,
+        clock: Optional[PtsClock] = None,
+    ):
+        if capture_mode not in CAPTURE_MODES:
+            raise ValueError(
+                f"Unknown capture_mode {capture_mode!r}; expected one of {CAPTURE_MODES}."
+            )
+        if capture_mode == "ffmpeg" and not isinstance(source, str):
+            raise ValueError("capture_mode='ffmpeg' needs a URL or file path source.")
+
+        self.target          = source
+        self.capture_mode    = capture_mode
+        self.backend         = backend
+        self.decoder_threads = decoder_threads
+        self.rtsp_transport  = rtsp_transport
+        self.decode_size     = decode_size
+        self.decode_fps      = decode_fps
+        self.clock           = clock
+        self.keyframes_only  = False
+
+        self.width: int    = 0
+        self.height: int   = 0
+        self.fps: float    = 0.0
+        self.cap: Optional[cv2.VideoCapture] = None
+        self._writer: Optional[FFmpegRingWriter] = None
+        self._reader: Optional[Any] = None      # LatestFrameGrabber / RingFrameReader
+        self._dropped: int = 0
+
+    @property
+    def frames_dropped(self) -> int:
+        live = self._reader.frames_dropped if self._reader is not None else 0
+        return self._dropped + live
+
+    def open(self, target: Any = None) -> bool:
+        """
+        (Re)open the stream, optionally switching to a different *target* URL.
+
+        Returns:
+            bool: False if the source could not be opened.
+        """
+        self.close()
+        if target is not None:
+            self.target = target
+        if self.clock is not None:
+            self.clock.reset()
+
+        if self.capture_mode == "ffmpeg":
+            try:
+                self.width, self.height = (
+                    self.decode_size or probe_stream_size(self.target)
+                )
+            except (subprocess.SubprocessError, OSError, IndexError, ValueError):
+                return False
+            self.fps = self.decode_fps or 0.0
+            writer = FFmpegRingWriter(
+                self.target, self.width, self.height, fps=self.decode_fps,
+                clock=self.clock, decoder_threads=self.decoder_threads,
+                rtsp_transport=self.rtsp_transport,
+                keyframes_only=self.keyframes_only,
+            )
+            try:
+                self._writer = writer.start()
+            except RuntimeError as exc:
+                print(f"[CCTV] {exc}")
+                return False
+            self._reader = RingFrameReader(self._writer.ring)
+            return True
+
+        cap = open_capture(
+            self.target, self.backend, decoder_threads=self.decoder_threads,
+            rtsp_transport=self.rtsp_transport,
+        )
+        if not cap.isOpened():
+            cap.release()
+            return False
+        self.cap    = cap
+        self.width  = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps    = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if self.capture_mode == "latest":
+            self._reader = LatestFrameGrabber(cap, clock=self.clock).start()
+        return True
+
+    def set_keyframes_only(self, enabled: bool) -> bool:
+        """
+        Switch the "ffmpeg" mode decoder between all frames and keyframes only.
+        The FFmpeg process is restarted with the new `-skip_frame` setting,
+        which for RTSP means a new session (DESCRIBE / SETUP / PLAY) and a
+        wait for the next keyframe.  Some cameras cap concurrent sessions,
+        so callers should switch rarely; run_cctv_stream stays on full
+        decoding for KEYFRAME_COOLDOWN after each wake-up.
+
+        Returns:
+            bool: False if the stream could not be reopened.
+        """
+        if self.capture_mode != "ffmpeg":
+            raise ValueError("Keyframe-only decoding needs capture_mode='ffmpeg'.")
+        if enabled == self.keyframes_only:
+            return True
+        self.keyframes_only = enabled
+        return self.open()
+
+    def _stamp(self) -> float:
+        now = time.time()
+        if self.clock is not None:
+            now = self.clock.stamp(capture_pts(self.cap), now)
+        return now
+
+    def read(
+        self,
+        want: Optional[Callable[[float], bool]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Return the next frame as (ok, frame, timestamp).
+
+        Args:
+            want (Optional[Callable[[float], bool]]): In "grab" mode, called with
+                the grabbed frame's timestamp; the frame is only retrieved
+                (converted to BGR) if it returns True, otherwise (True, None, t)
+                is returned.  Ignored by the other modes.
+            timeout (Optional[float]): In "latest" and "ffmpeg" mode, give up
+                after this many seconds without a new frame and return
+                ok=False, as for a dropped stream (None = wait indefinitely).
+                "direct" and "grab" rely on OpenCV's own FFmpeg read timeout.
+        """
+        if self._reader is not None:
+            return self._reader.read(timeout)
+        if self.cap is None:
+            return False, None, 0.0
+
+        if self.capture_mode == "grab":
+            if not self.cap.grab():
+                return False, None, 0.0
+            now = self._stamp()
+            if want is not None and not want(now):
+                return True, None, now
+            ret, frame = self.cap.retrieve()
+            return ret, frame, now
+
+        ret, frame = self.cap.read()
+        return ret, frame, (self._stamp() if ret else 0.0)
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.stop()
+            self._dropped += self._reader.frames_dropped
+            self._reader = None
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+BUS_POLICIES = ("latest", "drop_oldest", "drop_newest")
+
+
+class FrameSubscription:
+    """
+    One consumer's view of a FrameBus: a small queue of (frame, timestamp)
+    with its own rate limit and overflow policy.
+
+    Policies:
+        "latest"      – keep only the newest frame (queue of one).
+        "drop_oldest" – bounded queue of *maxsize*; overflow evicts the oldest.
+        "drop_newest" – bounded queue of *maxsize*; overflow rejects the new frame.
+    """
+    def __init__(
+        self,
+        name: str,
+        min_interval: float = 0.0,
+        policy: str = "latest",
+        maxsize: int = 1,
+    ):
+        if policy not in BUS_POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {BUS_POLICIES}.")
+        self.name         = name
+        self.min_interval = min_interval
+        self.policy       = policy
+        self.maxsize      = 1 if policy == "latest" else max(1, maxsize)
+
+        self._queue: Deque[Tuple[np.ndarray, float]] = deque()
+        self._cond = threading.Condition()
+        self._last_accepted: float = float("-inf")
+
+        self.delivered: int    = 0   # frames handed to the consumer
+        self.dropped: int      = 0   # frames lost to the overflow policy
+        self.rate_limited: int = 0   # frames skipped by min_interval
+
+    def offer(self, frame: np.ndarray, timestamp: float) -> None:
+        if timestamp - self._last_accepted < self.min_interval:
+            self.rate_limited += 1
+            return
+        with self._cond:
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == "drop_newest":
+                    return
+                self._queue.popleft()
+            self._queue.append((frame, timestamp))
+            self._last_accepted = timestamp
+            self._cond.notify()
+
+    def poll(self) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Non-blocking: the oldest queued (frame, timestamp), or None.
+        """
+        with self._cond:
+            if not self._queue:
+                return None
+            self.delivered += 1
+            return self._queue.popleft()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Blocking variant of poll() for consumers running on their own thread.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: bool(self._queue), timeout):
+                return None
+            self.delivered += 1
+            return self._queue.popleft()
+
+
+class FrameBus:
+    """
+    Fans each decoded frame out to any number of FrameSubscriptions.
+
+    Frames are shared, not copied: publish() marks the array read-only and
+    every subscriber receives the same object.  A consumer that needs to draw
+    on a frame (the preview) copies it into its own buffer first; one that
+    keeps frames longer than a few samples (e.g. off a SharedFrameRing view)
+    must copy them as well.
+    """
+    def __init__(self):
+        self._subs: List[FrameSubscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        name: str,
+        min_interval: float = 0.0,
+        policy: str = "latest",
+        maxsize: int = 1,
+    ) -> FrameSubscription:
+        sub = FrameSubscription(name, min_interval, policy, maxsize)
+        with self._lock:
+            self._subs.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: FrameSubscription) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def publish(self, frame: np.ndarray, timestamp: float) -> None:
+        if frame.flags.writeable:
+            frame.flags.writeable = False
+        with self._lock:
+            subs = list(self._subs)
+        for sub in subs:
+            sub.offer(frame, timestamp)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                sub.name: {
+                    "delivered":    sub.delivered,
+                    "dropped":      sub.dropped,
+                    "rate_limited": sub.rate_limited,
+                }
+                for sub in self._subs
+            }
+
+
+class FreezeDetector:
+    """
+    Cheap duplicate-frame check for NVR channels that repeat their last frame
+    when the network hiccups.
+
+    The fingerprint is an INTER_AREA downsample of the frame to *grid*
+    (preallocated, so no per-frame allocation), compared exactly with the
+    previous one.  Repeated frames are bit-identical copies, whereas live
+    video never is: sensor noise alone changes some cells, and a moving hand
+    changes every cell it crosses, however still the background.  Each cell
+    averages only a few hundred pixels at the default grid (16×16 on a
+    1440p stream).  `repeats` counts consecutive duplicates and `run_start`
+    is the timestamp at which the repeated picture was first seen.
+    """
+    def __init__(self, grid: Tuple[int, int] = (160, 90)):
+        self.grid = grid
+
+        self.repeats: int = 0
+        self.run_start: Optional[float] = None
+        self._thumb = np.empty((grid[1], grid[0], 3), dtype=np.uint8)
+        self._last  = np.empty_like(self._thumb)
+        self._have_last: bool = False
+
+    def fingerprint(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        if (w, h) == self.grid:
+            np.copyto(self._thumb, frame)
+        else:
+            cv2.resize(frame, self.grid, dst=self._thumb, interpolation=cv2.INTER_AREA)
+        return self._thumb
+
+    def check(self, frame: np.ndarray, timestamp: float) -> bool:
+        """
+        Returns:
+            bool: True if *frame* repeats the previously checked frame.
+        """
+        thumb = self.fingerprint(frame)
+        duplicate = self._have_last and np.array_equal(thumb, self._last)
+        if duplicate:
+            self.repeats += 1
+        else:
+            self.repeats   = 0
+            self.run_start = timestamp
+        # Swap buffers: this fingerprint becomes the reference
+        self._thumb, self._last = self._last, self._thumb
+        self._have_last = True
+        return duplicate
+
+
+class MotionGate:
+    """
+    Frame-differencing test run before hand inference.
+
+    The region is shrunk by *cell_size* on each axis to a grayscale
+    thumbnail (INTER_AREA, then a 3×3 blur against sensor noise) and
+    compared with the thumbnail of the last frame that passed the gate.
+    Keeping a thumbnail pixel only a few region pixels wide lets a hand that
+    shifts by a few pixels change whole cells, whatever the region's size.
+    Motion means the changed cells (by over *pixel_threshold* grey levels)
+    cover more than *min_changed_px* region pixels.  Comparing against the
+    last passed frame, not the previous sample, keeps slow movement from
+    slipping through in small steps.  After *refresh_seconds* without motion
+    the gate passes one frame anyway, so lighting drift cannot hide a hand
+    for long.
+    """
+    def __init__(
+        self,
+        cell_size: int = 4,
+        pixel_threshold: int = 15,
+        min_changed_px: int = 256,
+        refresh_seconds: float = 5.0,
+    ):
+        self.cell_size       = cell_size
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_px  = min_changed_px
+        self.refresh_seconds = refresh_seconds
+
+        self.still: int = 0                      # consecutive frames without motion
+        self.grid: Optional[Tuple[int, int]] = None
+        self._reference: Optional[np.ndarray] = None
+        self._reference_time: float = float("-inf")
+
+    def reset(self) -> None:
+        """Forget the reference, e.g. after a stream switch or reconnect."""
+        self._reference = None
+        self.still = 0
+
+    def _resize_buffers(self, region: np.ndarray) -> None:
+        # Thumbnail buffers follow the region's size (ROI, substream switch)
+        h, w = region.shape[:2]
+        grid = (max(1, w // self.cell_size), max(1, h // self.cell_size))
+        if grid == self.grid:
+            return
+        self.grid   = grid
+        self._small = np.empty((grid[1], grid[0], 3), dtype=np.uint8)
+        self._gray  = np.empty((grid[1], grid[0]), dtype=np.uint8)
+        self._diff  = np.empty((grid[1], grid[0]), dtype=np.uint8)
+        self._reference = None
+
+    def check(self, region: np.ndarray, timestamp: float) -> bool:
+        """
+        Args:
+            region (np.ndarray): BGR frame or workstation ROI view.
+            timestamp (float): Capture time of the frame.
+
+        Returns:
+            bool: True if the region moved (or a refresh is due) and inference
+                  should run; False if it is unchanged.
+        """
+        self._resize_buffers(region)
+        cv2.resize(region, self.grid, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.blur(self._gray, (3, 3), dst=self._gray)
+
+        if (self._reference is not None
+                and timestamp - self._reference_time < self.refresh_seconds):
+            cv2.absdiff(self._gray, self._reference, dst=self._diff)
+            cv2.threshold(self._diff, self.pixel_threshold, 1, cv2.THRESH_BINARY, dst=self._diff)
+            changed = cv2.countNonZero(self._diff)
+            if changed * self.cell_size ** 2 <= self.min_changed_px:
+                self.still += 1
+                return False
+
+        if self._reference is None:
+            self._reference = np.empty_like(self._gray)
+        np.copyto(self._reference, self._gray)
+        self._reference_time = timestamp
+        self.still = 0
+        return True
+
+
+class KnuckleFlowTracker:
+    """
+    Carries one landmark from frame to frame with pyramidal Lucas-Kanade
+    optical flow, so hand inference can run less often than sampling.
+
+    Only a grayscale patch of `2 * patch_radius` pixels around the point is
+    converted and tracked.  A step is rejected, and the tracker goes
+    inactive until the next `reset`, when LK loses the point, its matching
+    error exceeds *max_error*, or tracking the new position back to the
+    old frame misses by more than *max_fb_error* pixels
+    (forward-backward check).
+    """
+    def __init__(
+        self,
+        patch_radius: int = 64,
+        win_size: Tuple[int, int] = (15, 15),
+        max_level: int = 3,
+        max_error: float = 12.0,
+        max_fb_error: float = 1.0,
+    ):
+        self.patch_radius = patch_radius
+        self.win_size     = win_size
+        self.max_level    = max_level
+        self.max_error    = max_error
+        self.max_fb_error = max_fb_error
+        self.criteria     = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+
+        self.point: Optional[Tuple[float, float]] = None
+        self._patch: Optional[np.ndarray] = None
+        self._window: Tuple[int, int, int, int] = (0, 0, 0, 0)   # x0, y0, x1, y1
+
+    @property
+    def active(self) -> bool:
+        return self.point is not None
+
+    def _window_at(self, frame: np.ndarray, point: Tuple[float, float]) -> Tuple[int, int, int, int]:
+        h, w = frame.shape[:2]
+        r = self.patch_radius
+        x0, y0 = max(0, int(point[0]) - r), max(0, int(point[1]) - r)
+        return x0, y0, min(w, int(point[0]) + r), min(h, int(point[1]) + r)
+
+    def _gray(self, frame: np.ndarray, window: Tuple[int, int, int, int]) -> np.ndarray:
+        x0, y0, x1, y1 = window
+        return cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+
+    def reset(self, frame: np.ndarray, point: Optional[Tuple[float, float]]) -> None:
+        """
+        Re-anchor on a fresh detection (*point* in frame pixels), or stop
+        tracking when *point* is None.
+        """
+        self.point = None
+        self._patch = None
+        if point is None:
+            return
+        h, w = frame.shape[:2]
+        if not (0 <= point[0] < w and 0 <= point[1] < h):
+            return
+        self._window = self._window_at(frame, point)
+        self._patch  = self._gray(frame, self._window)
+        self.point   = (float(point[0]), float(point[1]))
+
+    def track(self, frame: np.ndarray) -> Optional[Tuple[float, float]]:
+        """
+        Returns:
+            Optional[Tuple[float, float]]: The point's position in *frame*
+                (frame pixels), or None if it was lost and a detection is needed.
+        """
+        if self.point is None:
+            return None
+        x0, y0, x1, y1 = self._window
+        if frame.shape[0] < y1 or frame.shape[1] < x1:
+            self.point = None                    # stream changed resolution
+            return None
+        current = self._gray(frame, self._window)
+
+        p0 = np.array([[[self.point[0] - x0, self.point[1] - y0]]], dtype=np.float32)
+        lk = dict(winSize=self.win_size, maxLevel=self.max_level, criteria=self.criteria)
+        p1, status, err = cv2.calcOpticalFlowPyrLK(self._patch, current, p0, None, **lk)
+        if not status[0, 0] or err[0, 0] > self.max_error:
+            self.point = None
+            return None
+        back, status, _ = cv2.calcOpticalFlowPyrLK(current, self._patch, p1, None, **lk)
+        if not status[0, 0] or float(np.hypot(*(back - p0)[0, 0])) > self.max_fb_error:
+            self.point = None
+            return None
+
+        point = (float(p1[0, 0, 0]) + x0, float(p1[0, 0, 1]) + y0)
+        self.reset(frame, point)                 # re-centre the patch
+        return self.point
+
+
+SUBSTREAM_MIN_HAND_PX: float = 40.0   # smallest hand extent (px) trusted on a substream
+
+
+def dahua_stream_url(url: str, subtype: int) -> str:
+    """
+    Return *url* with its Dahua `subtype` query parameter set
+    (0 = main stream, 1 = sub stream).
+    """
+    if re.search(r"[?&]subtype=\d+", url):
+        return re.sub(r"([?&])subtype=\d+", rf"\g<1>subtype={subtype}", url)
+    sep = "&" if "?" in url else "?"
+    return f"{url}{sep}subtype={subtype}"
+
+
+class SubstreamSwitcher:
+    """
+    Hysteresis policy for moving a camera between its main and sub stream.
+
+    Hand extents are given in reference (main-stream) pixels and projected to
+    the substream with *sub_width* / *main_width*.  The switcher moves to the
+    substream after *patience* consecutive confident detections whose
+    projected extent clears `min_hand_px * margin`, and back to the main
+    stream after *patience* consecutive weak samples (no hand, low score, or
+    a hand too small on the substream).  After falling back it waits
+    *cooldown* seconds before trying the substream again.
+    """
+    def __init__(
+        self,
+        main_width: int,
+        sub_width: int = 704,           # Dahua default D1 substream
+        min_hand_px: float = SUBSTREAM_MIN_HAND_PX,
+        margin: float = 1.5,
+        min_confidence: float = 0.8,
+        patience: int = 5,
+        cooldown: float = 30.0,
+    ):
+        self.main_width     = main_width
+        self.sub_width      = sub_width
+        self.min_hand_px    = min_hand_px
+        self.margin         = margin
+        self.min_confidence = min_confidence
+        self.patience       = patience
+        self.cooldown       = cooldown
+
+        self.on_sub: bool = False
+        self._streak: int = 0
+        self._cooldown_until: float = float("-inf")
+
+    def update(
+        self, now: float, extent_ref: Optional[float], score: Optional[float]
+    ) -> bool:
+        """
+        Feed one sample (extent_ref / score are None when no hand was found).
+
+        Returns:
+            bool: True if the caller should switch streams now; `on_sub`
+                  already reflects the new target.
+        """
+        extent_sub = (
+            extent_ref * self.sub_width / self.main_width
+            if extent_ref is not None else 0.0
+        )
+        confident = score is not None and score >= self.min_confidence
+
+        if not self.on_sub:
+            ok = confident and extent_sub >= self.min_hand_px * self.margin
+            self._streak = self._streak + 1 if ok else 0
+            if self._streak >= self.patience and now >= self._cooldown_until:
+                self.on_sub, self._streak = True, 0
+                return True
+        else:
+            weak = not confident or extent_sub < self.min_hand_px
+            self._streak = self._streak + 1 if weak else 0
+            if self._streak >= self.patience:
+                self.on_sub, self._streak = False, 0
+                self._cooldown_until = now + self.cooldown
+                return True
+        return False
+
+    def fall_back(self, now: float) -> None:
+        """
+        Record that the substream could not be used (e.g. failed to open).
+        """
+        self.on_sub, self._streak = False, 0
+        self._cooldown_until = now + self.cooldown
@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from live import (
+    MIDDLE_KNUCKLE_IDX,
+    get_knuckle_and_hand_extent,
+    initialize_mediapipe_hands,
+)
+
+# (x_px, y_px, extent_px, score) in full-frame pixels, as returned by
+# get_knuckle_and_hand_extent
+Detection = Tuple[float, float, float, float]
+
+
+class LandmarkProvider(ABC):
+    """
+    Interface for anything that turns a BGR frame into a knuckle detection.
+
+    Providers load their model in `__init__`, answer `process` for one frame
+    and `process_batch` for several, and release resources in `close`.
+    They can be used as context managers.  run_cctv_stream accepts any
+    provider through its *provider* argument in place of the built-in
+    MediaPipe Hands instance.  `process` is abstract, so a provider that
+    lacks it fails at construction rather than inside the capture loop.
+    """
+    name: str = "provider"
+
+    @abstractmethod
+    def process(
+        self,
+        frame: np.ndarray,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        target_resolution: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Detection]:
+        """
+        Args:
+            frame (np.ndarray): BGR frame.
+            roi (Optional[Tuple[int, int, int, int]]): Workstation region
+                (x, y, width, height) in frame pixels.
+            target_resolution (Optional[Tuple[int, int]]): Inference size
+                hint; providers that cannot use it ignore it.
+
+        Returns:
+            Optional[Detection]: (x_px, y_px, extent_px, score) in full-frame
+                                 pixels, or None if no hand is found.
+        """
+
+    def process_batch(
+        self,
+        frames: Sequence[np.ndarray],
+        rois: Optional[Sequence[Optional[Tuple[int, int, int, int]]]] = None,
+        target_resolution: Optional[Tuple[int, int]] = None,
+    ) -> List[Optional[Detection]]:
+        """
+        Detect on several frames.  The default runs `process` on each in
+        order; providers with a real batch path override it.
+        """
+        rois = rois if rois is not None else [None] * len(frames)
+        return [
+            self.process(frame, roi, target_resolution)
+            for frame, roi in zip(frames, rois)
+        ]
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "LandmarkProvider":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class MediaPipeHandsProvider(LandmarkProvider):
+    """
+    The `mp.solutions.hands` path used by run_cctv_stream, as a provider.
+    """
+    name = "mediapipe"
+
+    def __init__(
+        self,
+        model_complexity: int = 0,
+        static_image_mode: bool = False,
+        min_detection_confidence: float = 0.7,
+        min_tracking_confidence: float = 0.5,
+        landmark_idx: int = MIDDLE_KNUCKLE_IDX,
+    ):
+        self.name = f"mediapipe/c={model_complexity}"
+        self.landmark_idx = landmark_idx
+        self.hands, _ = initialize_mediapipe_hands(
+            max_num_hands=1,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            model_complexity=model_complexity,
+            static_image_mode=static_image_mode,
+        )
+
+    def process(
+        self,
+        frame: np.ndarray,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        target_resolution: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Detection]:
+        return get_knuckle_and_hand_extent(
+            frame, self.hands, self.landmark_idx,
+            roi=roi, target_resolution=target_resolution,
+        )
+
+    def close(self) -> None:
+        self.hands.close()
+
+
+class ReplayProvider(LandmarkProvider):
+    """
+    Deterministic stand-in that ignores the frame and returns recorded
+    detections in order, for load-testing the pipeline without a model.
+
+    Args:
+        detections (Iterable[Optional[Sequence[float]]]): One entry per call:
+            None (no hand), (x, y) or (x, y, extent_px, score).
+        loop (bool): Start over after the last entry instead of returning None.
+        default_extent (float): Extent reported for (x, y) entries.
+    """
+    name = "replay"
+
+    def __init__(
+        self,
+        detections: Iterable[Optional[Sequence[float]]],
+        loop: bool = True,
+        default_extent: float = 100.0,
+    ):
+        self.detections: List[Optional[Detection]] = [
+            None if d is None else (
+                float(d[0]), float(d[1]),
+                float(d[2]) if len(d) > 2 else default_extent,
+                float(d[3]) if len(d) > 3 else 1.0,
+            )
+            for d in detections
+        ]
+        self.loop  = loop
+        self.index = 0
+
+    @classmethod
+    def from_trajectory(
+        cls, trajectory: np.ndarray, sample_interval: float, loop: bool = True
+    ) -> "ReplayProvider":
+        """
+        Build a replay from an offline.extract_trajectory result, inserting
+        None for sample slots where no hand was detected.
+        """
+        if not len(trajectory):
+            return cls([], loop=loop)
+        slots = np.rint((trajectory[:, 0] - trajectory[0, 0]) / sample_interval).astype(int)
+        detections: List[Optional[Sequence[float]]] = [None] * (int(slots[-1]) + 1)
+        for slot, (_, x, y) in zip(slots, trajectory):
+            detections[slot] = (x, y)
+        return cls(detections, loop=loop)
+
+    def process(
+        self,
+        frame: np.ndarray,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        target_resolution: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Detection]:
+        if self.index >= len(self.detections):
+            if not self.loop or not self.detections:
+                return None
+            self.index = 0
+        detection = self.detections[self.index]
+        self.index += 1
+        return detection
@@ -0,0 +1,338 @@
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from capture import FrameSource, PtsClock
+from live import (
+    MIDDLE_KNUCKLE_IDX,
+    READ_TIMEOUT,
+    SAMPLE_INTERVAL,
+    StreamProcessor,
+    crop_roi,
+    fit_resolution,
+    get_knuckle_and_hand_extent,
+    initialize_mediapipe_hands,
+)
+
+MOSAIC_TILE_SIZE: Tuple[int, int] = (320, 240)   # (width, height) of one camera's tile
+
+# (x_px, y_px, extent_px, score) in the camera's full-frame pixels
+Detection = Tuple[float, float, float, float]
+
+
+class MosaicBatcher:
+    """
+    Hand detection for several cameras in a single `hands.process` call.
+
+    Each camera's workstation ROI is shrunk (INTER_AREA, aspect ratio kept)
+    into its own tile of a preallocated mosaic.  The tiles form a grid and
+    MediaPipe runs once with max_num_hands equal to the tile count.  A hand
+    belongs to the tile that contains its knuckle, and its coordinates are
+    mapped back to that camera's full-frame pixels.  A tile keeps at most
+    one hand, the one with the best handedness score.
+
+    MediaPipe sees each workstation at tile size, so the tile has to be
+    large enough for its palm detector: a 320×240 tile leaves a hand that
+    fills a third of the ROI at roughly 96×72 px.  Measure recall against
+    one graph per camera with bench_mosaic.py on the site's own footage
+    before using it (run_mosaic_streams(mosaic=True)).
+
+    Args:
+        n_tiles (int): Number of cameras batched together.
+        tile_size (Tuple[int, int]): (width, height) of each tile.
+        cols (Optional[int]): Tiles per mosaic row (default: a square grid).
+        model_complexity (int): Passed to initialize_mediapipe_hands.
+        min_detection_confidence (float): Passed to initialize_mediapipe_hands.
+        min_tracking_confidence (float): Passed to initialize_mediapipe_hands.
+        landmark_idx (int): Landmark reported as the knuckle.
+    """
+    def __init__(
+        self,
+        n_tiles: int,
+        tile_size: Tuple[int, int] = MOSAIC_TILE_SIZE,
+        cols: Optional[int] = None,
+        model_complexity: int = 0,
+        min_detection_confidence: float = 0.7,
+        min_tracking_confidence: float = 0.5,
+        landmark_idx: int = MIDDLE_KNUCKLE_IDX,
+    ):
+        self.n_tiles      = n_tiles
+        self.tile_size    = tile_size
+        self.cols         = cols or math.ceil(math.sqrt(n_tiles))
+        self.rows         = math.ceil(n_tiles / self.cols)
+        self.landmark_idx = landmark_idx
+
+        tw, th = tile_size
+        self.mosaic = np.zeros((self.rows * th, self.cols * tw, 3), dtype=np.uint8)
+        self.rgb    = np.empty_like(self.mosaic)
+        # Per tile: (scale, roi_x0, roi_y0, content_w, content_h) of the last compose
+        self.placement: List[Optional[Tuple[float, int, int, int, int]]] = [None] * n_tiles
+
+        self.hands, _ = initialize_mediapipe_hands(
+            max_num_hands=n_tiles,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            model_complexity=model_complexity,
+        )
+
+    def tile_origin(self, index: int) -> Tuple[int, int]:
+        return (index % self.cols) * self.tile_size[0], (index // self.cols) * self.tile_size[1]
+
+    def compose(
+        self,
+        frames: Sequence[Optional[np.ndarray]],
+        rois: Optional[Sequence[Optional[Tuple[int, int, int, int]]]] = None,
+    ) -> np.ndarray:
+        """
+        Write each camera's ROI into its tile (None leaves the tile black).
+
+        Returns:
+            np.ndarray: The mosaic (a reused buffer).
+        """
+        tw, th = self.tile_size
+        rois = rois if rois is not None else [None] * len(frames)
+        for i in range(self.n_tiles):
+            x0, y0 = self.tile_origin(i)
+            tile = self.mosaic[y0:y0 + th, x0:x0 + tw]
+            frame = frames[i] if i < len(frames) else None
+            if frame is None:
+                tile[:] = 0
+                self.placement[i] = None
+                continue
+
+            crop, cx, cy = crop_roi(frame, rois[i])
+            h, w = crop.shape[:2]
+            cw, ch = fit_resolution(w, h, self.tile_size)
+            content = tile[:ch, :cw]
+            if (cw, ch) == (w, h):
+                np.copyto(content, crop)
+            else:
+                cv2.resize(crop, (cw, ch), dst=content, interpolation=cv2.INTER_AREA)
+            tile[ch:] = 0
+            tile[:ch, cw:] = 0
+            self.placement[i] = (cw / w, cx, cy, cw, ch)
+        return self.mosaic
+
+    def process(
+        self,
+        frames: Sequence[Optional[np.ndarray]],
+        rois: Optional[Sequence[Optional[Tuple[int, int, int, int]]]] = None,
+    ) -> List[Optional[Detection]]:
+        """
+        Detect hands for every camera at once.
+
+        Args:
+            frames (Sequence[Optional[np.ndarray]]): One BGR frame per tile
+                (None for a camera with no frame this round).
+            rois (Optional[Sequence[Optional[Tuple[int, int, int, int]]]]):
+                Per-camera (x, y, width, height) in that camera's pixels.
+
+        Returns:
+            List[Optional[Detection]]: Per camera, (x_px, y_px, extent_px,
+                score) in its full-frame pixels, or None.
+        """
+        self.compose(frames, rois)
+        cv2.cvtColor(self.mosaic, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        self.rgb.flags.writeable = False
+        results = self.hands.process(self.rgb)
+        self.rgb.flags.writeable = True
+
+        detections: List[Optional[Detection]] = [None] * self.n_tiles
+        if not results.multi_hand_landmarks:
+            return detections
+
+        mh, mw = self.mosaic.shape[:2]
+        tw, th = self.tile_size
+        for hand, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+            lm = hand.landmark[self.landmark_idx]
+            kx, ky = lm.x * mw, lm.y * mh
+            col, row = int(kx // tw), int(ky // th)
+            index = row * self.cols + col
+            if not (0 <= col < self.cols and 0 <= index < self.n_tiles):
+                continue
+            placement = self.placement[index]
+            if placement is None:
+                continue
+            scale, cx, cy, cw, ch = placement
+            x0, y0 = self.tile_origin(index)
+            if kx - x0 >= cw or ky - y0 >= ch:
+                continue                        # in the tile's black padding
+
+            score = handedness.classification[0].score
+            if detections[index] is not None and detections[index][3] >= score:
+                continue
+            xs = [p.x for p in hand.landmark]
+            ys = [p.y for p in hand.landmark]
+            extent = max((max(xs) - min(xs)) * mw, (max(ys) - min(ys)) * mh) / scale
+            detections[index] = (
+                cx + (kx - x0) / scale, cy + (ky - y0) / scale, extent, score
+            )
+        return detections
+
+    def close(self) -> None:
+        self.hands.close()
+
+
+class _PerCameraHands:
+    """
+    One MediaPipe graph per camera, with MosaicBatcher's `process` / `close`
+    interface: full-resolution detection, the recall baseline.
+    """
+    def __init__(self, n_cameras: int, landmark_idx: int = MIDDLE_KNUCKLE_IDX):
+        self.landmark_idx = landmark_idx
+        self.graphs = [initialize_mediapipe_hands(max_num_hands=1)[0] for _ in range(n_cameras)]
+
+    def process(
+        self,
+        frames: Sequence[Optional[np.ndarray]],
+        rois: Optional[Sequence[Optional[Tuple[int, int, int, int]]]] = None,
+    ) -> List[Optional[Detection]]:
+        rois = rois if rois is not None else [None] * len(frames)
+        return [
+            None if frame is None
+            else get_knuckle_and_hand_extent(frame, hands, self.landmark_idx, roi=roi)
+            for hands, frame, roi in zip(self.graphs, frames, rois)
+        ]
+
+    def close(self) -> None:
+        for hands in self.graphs:
+            hands.close()
+
+
+def run_mosaic_streams(
+    processors: Sequence[StreamProcessor],
+    sources: Sequence[Any],
+    rois: Optional[Sequence[Optional[Tuple[int, int, int, int]]]] = None,
+    sample_interval: float = SAMPLE_INTERVAL,
+    tile_size: Tuple[int, int] = MOSAIC_TILE_SIZE,
+    max_seconds: Optional[float] = None,
+    provider: Optional[Any] = None,
+    mosaic: bool = False,
+) -> Dict[str, Any]:
+    """
+    Sample several cameras together and detect on all of them each round:
+    one MediaPipe graph per camera by default, one MosaicBatcher call with
+    *mosaic*, or one provider.process_batch call with *provider*.
+
+    Each camera is read in "latest" capture mode, so every round uses the
+    newest frame of each stream, timestamped by its own PtsClock.  Reads
+    share the round's time budget, so a stalled camera is skipped for the
+    round instead of holding up the others; one that delivers nothing for
+    READ_TIMEOUT seconds (or whose file ends) is left out of later rounds.
+    Samples go to the processor at the same position as the camera.
+    Reconnects, substreams and preview are run_cctv_stream features and are
+    not available here.
+
+    Args:
+        processors (Sequence[StreamProcessor]): One per camera.
+        sources (Sequence[Any]): Camera indices / URLs / files.
+        rois (Optional[Sequence[Optional[Tuple[int, int, int, int]]]]):
+            Per-camera workstation region in that camera's pixels.
+        sample_interval (float): Seconds between rounds.
+        tile_size (Tuple[int, int]): See MosaicBatcher (*mosaic* only).
+        max_seconds (Optional[float]): Stop after this long (None = until
+                                       every stream ends or Ctrl-C).
+        provider (Optional[landmarks.LandmarkProvider]): Detect with this
+                                       provider's process_batch instead of a
+                                       mosaic, e.g. a TFLiteHandsProvider.
+                                       It must accept None for a camera
+                                       without a frame.  The caller owns it
+                                       and closes it.
+        mosaic (bool): Batch all cameras through one MosaicBatcher.  Tiles
+                       shrink every hand, so check recall with
+                       bench_mosaic.py first (see MosaicBatcher).
+
+    Returns:
+        Dict[str, Any]: Statistics ("rounds", "samples" and "missed_reads"
+                        per camera, "inference_seconds").
+
+    Raises:
+        ValueError: If *processors* and *sources* differ in length.
+        RuntimeError: If a source cannot be opened.
+    """
+    if len(processors) != len(sources):
+        raise ValueError("Need one StreamProcessor per source.")
+
+    streams: List[Optional[FrameSource]] = []
+    for source in sources:
+        stream = FrameSource(source, "latest", clock=PtsClock())
+        if not stream.open():
+            for opened in streams:
+                opened.close()
+            raise RuntimeError(f"Cannot open video source: {source!r}.")
+        streams.append(stream)
+
+    n = len(sources)
+    if provider is not None:
+        batcher = None
+        detect = provider.process_batch
+        layout = f"batched through {provider.name}"
+    elif mosaic:
+        batcher = MosaicBatcher(n, tile_size=tile_size)
+        detect = batcher.process
+        layout = f"in a {batcher.cols}×{batcher.rows} mosaic of {tile_size[0]}×{tile_size[1]} tiles"
+    else:
+        batcher = _PerCameraHands(n)
+        detect = batcher.process
+        layout = "one MediaPipe graph each"
+    stats: Dict[str, Any] = {
+        "rounds": 0, "samples": [0] * n, "missed_reads": [0] * n,
+        "inference_seconds": 0.0,
+    }
+    print(f"[MOSAIC] {n} cameras {layout}  |  sampling every {sample_interval}s")
+
+    started = time.time()
+    last_frame_at = [started] * n
+    try:
+        while any(s is not None for s in streams):
+            if max_seconds is not None and time.time() - started >= max_seconds:
+                break
+            round_start = time.time()
+            frames: List[Optional[np.ndarray]] = []
+            stamps: List[float] = []
+            for i, stream in enumerate(streams):
+                ok, frame, ts = False, None, 0.0
+                if stream is not None:
+                    budget = max(0.0, round_start + sample_interval - time.time())
+                    ok, frame, ts = stream.read(timeout=budget)
+                    if ok:
+                        last_frame_at[i] = time.time()
+                    elif time.time() - last_frame_at[i] >= READ_TIMEOUT:
+                        print(f"[MOSAIC] Camera {i} ended or stalled — dropping it.")
+                        stream.close()
+                        streams[i] = None
+                    else:
+                        stats["missed_reads"][i] += 1
+                frames.append(frame if ok else None)
+                stamps.append(ts)
+
+            t0 = time.perf_counter()
+            detections = detect(frames, rois)
+            stats["inference_seconds"] += time.perf_counter() - t0
+            stats["rounds"] += 1
+
+            for i, detection in enumerate(detections):
+                if detection is not None and frames[i] is not None:
+                    processors[i].add_data_point(stamps[i], detection[0], detection[1])
+                    stats["samples"][i] += 1
+
+            time.sleep(max(0.0, sample_interval - (time.time() - round_start)))
+    except KeyboardInterrupt:
+        print("[MOSAIC] Interrupted — stopping.")
+    finally:
+        for stream in streams:
+            if stream is not None:
+                stream.close()
+        if batcher is not None:
+            batcher.close()
+
+    per_round = stats["inference_seconds"] / max(stats["rounds"], 1)
+    print(
+        f"[MOSAIC] Session ended — {stats['rounds']} rounds, "
+        f"{1000 * per_round:.1f} ms inference per round "
+        f"({1000 * per_round / n:.1f} ms per camera)."
+    )
+    return stats
@@ -0,0 +1,295 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from live import (
+    SAMPLE_INTERVAL,
+    StreamProcessor,
+    get_middle_knuckle_coords,
+    initialize_mediapipe_hands,
+)
+
+SEEK_THRESHOLD: float = 2.0   # seek instead of grab-skipping for gaps longer than this (s)
+
+
+def iter_file_samples(
+    cap: cv2.VideoCapture,
+    sample_interval: float = SAMPLE_INTERVAL,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    seek_threshold: float = SEEK_THRESHOLD,
+    origin: Optional[float] = None,
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Yield (media_time_s, frame) for every *sample_interval* seconds of media
+    time in a recorded video, decoding as little as possible.
+
+    Frames between sample points are advanced with `cap.grab()` (no BGR
+    conversion).  When the next sample point is more than *seek_threshold*
+    seconds ahead, the capture seeks instead; OpenCV's FFmpeg backend seeks to
+    the preceding keyframe and decodes forward, so seeking only pays off once
+    the gap is longer than a GOP.
+
+    Args:
+        cap (cv2.VideoCapture): Opened capture on a video file.
+        sample_interval (float): Media seconds between yielded samples.
+        start (float): Media time of the first sample.
+        end (Optional[float]): Stop before this media time (None = end of file).
+        seek_threshold (float): Gap (s) above which a seek replaces grab-skipping.
+        origin (Optional[float]): Sample points are origin + k * sample_interval
+                                  (default: *start*).  Chunks of one file pass
+                                  the same origin so they pick the same frames
+                                  a single sequential pass would.
+
+    Yields:
+        Tuple[float, np.ndarray]: Frame presentation time in seconds and the
+                                  decoded BGR frame.
+    """
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    half_frame = 0.5 / fps
+
+    if origin is None:
+        origin = start
+    k = max(0, math.ceil((start - origin) / sample_interval - 1e-9))
+    next_t = origin + k * sample_interval
+
+    if next_t > 0:
+        # Land a little early: the sample frame is chosen by its own timestamp
+        # below, never by where the seek happened to stop.
+        cap.set(cv2.CAP_PROP_POS_MSEC, max(0.0, next_t - seek_threshold) * 1000.0)
+    seek_target: Optional[float] = None   # never seek twice for one sample point
+
+    while end is None or next_t < end:
+        if not cap.grab():
+            return
+        t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+        if t + half_frame < next_t:
+            if next_t - t > seek_threshold and seek_target != next_t:
+                seek_target = next_t
+                cap.set(cv2.CAP_PROP_POS_MSEC, next_t * 1000.0)
+            continue
+
+        ok, frame = cap.retrieve()
+        if not ok:
+            return
+        yield t, frame
+
+        # Stay on the sample grid even if the file skipped ahead
+        k += 1
+        if origin + k * sample_interval <= t:
+            k = math.floor((t - origin) / sample_interval) + 1
+        next_t = origin + k * sample_interval
+
+
+def run_video_file(
+    processor: StreamProcessor,
+    path: str,
+    sample_interval: float = SAMPLE_INTERVAL,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    time_offset: float = 0.0,
+    seek_threshold: float = SEEK_THRESHOLD,
+    static_image_mode: bool = False,
+    roi: Optional[Tuple[int, int, int, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Analyse a recorded video as fast as decoding and inference allow.
+
+    Unlike run_cctv_stream, samples are taken every *sample_interval* seconds
+    of media time and fed to *processor* with the media timestamp (plus
+    *time_offset*), so window results are independent of how long
+    processing takes.
+
+    Args:
+        processor (StreamProcessor): The StreamProcessor that classifies windows.
+        path (str): Path to the video file.
+        sample_interval (float): Media seconds between landmark samples.
+        start (float): Media time (s) to start at.
+        end (Optional[float]): Media time (s) to stop at (None = end of file).
+        time_offset (float): Added to every media timestamp, e.g. the epoch
+                             time the recording started.
+        seek_threshold (float): See iter_file_samples.
+        static_image_mode (bool): Passed to initialize_mediapipe_hands.
+        roi (Optional[Tuple[int, int, int, int]]): Workstation region
+                                  (x, y, width, height) in file pixels; see
+                                  get_middle_knuckle_coords.
+
+    Returns:
+        Dict[str, Any]: Statistics ("samples", "detections", "media_seconds",
+                        "wall_seconds").
+
+    Raises:
+        RuntimeError: If the file cannot be opened.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video file: {path!r}.")
+
+    hands, _ = initialize_mediapipe_hands(
+        max_num_hands=1, model_complexity=0, static_image_mode=static_image_mode
+    )
+    stats: Dict[str, Any] = {"samples": 0, "detections": 0, "media_seconds": 0.0}
+    wall_start = time.perf_counter()
+
+    try:
+        for t, frame in iter_file_samples(
+            cap, sample_interval, start=start, end=end, seek_threshold=seek_threshold
+        ):
+            stats["samples"] += 1
+            stats["media_seconds"] = t - start
+            coords = get_middle_knuckle_coords(frame, hands, roi=roi)
+            if coords is not None:
+                processor.add_data_point(time_offset + t, coords[0], coords[1])
+                stats["detections"] += 1
+    finally:
+        cap.release()
+        hands.close()
+
+    stats["wall_seconds"] = time.perf_counter() - wall_start
+    speedup = stats["media_seconds"] / stats["wall_seconds"] if stats["wall_seconds"] else 0.0
+    print(
+        f"[FILE] {path}: {stats['media_seconds']:.0f}s of media in "
+        f"{stats['wall_seconds']:.1f}s ({speedup:.1f}× real time), "
+        f"{stats['detections']}/{stats['samples']} samples with a hand, "
+        f"{len(processor.get_results())} windows classified."
+    )
+    return stats
+
+
+def extract_trajectory(
+    path: str,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    sample_interval: float = SAMPLE_INTERVAL,
+    origin: float = 0.0,
+    static_image_mode: bool = True,
+) -> np.ndarray:
+    """
+    Run get_middle_knuckle_coords over [start, end) of a recording.
+
+    Returns:
+        np.ndarray: (N, 3) float64 array of (media_t, x_px, y_px) rows for the
+                    samples where a hand was detected.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video file: {path!r}.")
+    hands, _ = initialize_mediapipe_hands(
+        max_num_hands=1, model_complexity=0, static_image_mode=static_image_mode
+    )
+
+    rows: List[Tuple[float, float, float]] = []
+    try:
+        for t, frame in iter_file_samples(
+            cap, sample_interval, start=start, end=end, origin=origin
+        ):
+            coords = get_middle_knuckle_coords(frame, hands)
+            if coords is not None:
+                rows.append((t, coords[0], coords[1]))
+    finally:
+        cap.release()
+        hands.close()
+    return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+
+def _extract_chunk(job: Tuple[str, float, Optional[float], float, float, bool]) -> np.ndarray:
+    return extract_trajectory(*job)
+
+
+def stitch_trajectories(chunks: List[np.ndarray]) -> np.ndarray:
+    """
+    Concatenate per-chunk trajectories in chunk order, dropping any sample
+    that does not advance time (a chunk that re-read a boundary frame).
+    """
+    rows = [c for c in chunks if len(c)]
+    if not rows:
+        return np.empty((0, 3), dtype=np.float64)
+    traj = np.concatenate(rows)
+    keep = np.ones(len(traj), dtype=bool)
+    keep[1:] = traj[1:, 0] > np.maximum.accumulate(traj[:-1, 0])
+    return traj[keep]
+
+
+def run_video_file_parallel(
+    processor: StreamProcessor,
+    path: str,
+    sample_interval: float = SAMPLE_INTERVAL,
+    chunk_seconds: float = 600.0,
+    workers: Optional[int] = None,
+    time_offset: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Analyse one long recording on every core.
+
+    The file is split into time chunks aligned to the sample grid, each chunk
+    is run through extract_trajectory in a process pool, and the stitched
+    trajectory is replayed into a single *processor*.  Because windowing
+    happens only after stitching, windows that span chunk boundaries are
+    built exactly as in a sequential pass.
+
+    Palm detection runs on every sample (static_image_mode=True) so a
+    chunk's first detection does not depend on tracking state from the
+    previous chunk; the result equals a sequential extract_trajectory over
+    the whole file.
+
+    Args:
+        processor (StreamProcessor): The StreamProcessor that classifies windows.
+        path (str): Path to the video file.
+        sample_interval (float): Media seconds between landmark samples.
+        chunk_seconds (float): Media length of each chunk (rounded down to a
+                               whole number of sample intervals).
+        workers (Optional[int]): Pool size (default: os.cpu_count()).
+        time_offset (float): Added to every media timestamp.
+
+    Returns:
+        Dict[str, Any]: Statistics ("chunks", "detections", "media_seconds",
+                        "wall_seconds").
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video file: {path!r}.")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+    cap.release()
+
+    step = max(1, int(chunk_seconds / sample_interval)) * sample_interval
+    n_chunks = max(1, math.ceil(duration / step))
+    jobs = [
+        (path, i * step, (i + 1) * step if i < n_chunks - 1 else None,
+         sample_interval, 0.0, True)
+        for i in range(n_chunks)
+    ]
+
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        chunks = list(pool.map(_extract_chunk, jobs))
+    traj = stitch_trajectories(chunks)
+
+    for t, x, y in traj:
+        processor.add_data_point(time_offset + float(t), float(x), float(y))
+
+    stats: Dict[str, Any] = {
+        "chunks":        n_chunks,
+        "detections":    len(traj),
+        "media_seconds": duration,
+        "wall_seconds":  time.perf_counter() - wall_start,
+    }
+    print(
+        f"[FILE] {path}: {duration:.0f}s of media in {n_chunks} chunks, "
+        f"{stats['wall_seconds']:.1f}s wall, {len(traj)} samples with a hand, "
+        f"{len(processor.get_results())} windows classified."
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    import sys
+
+    stream_processor = StreamProcessor()
+    run_video_file(stream_processor, sys.argv[1])
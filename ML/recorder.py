@@ -0,0 +1,232 @@
+import csv
+import os
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SEGMENT_SECONDS: float = 60.0
+SEGMENT_TIME_FORMAT: str = "%Y%m%d-%H%M%S"
+RESTART_BACKOFF: float     = 1.0    # first wait before restarting FFmpeg
+RESTART_MAX_BACKOFF: float = 60.0
+
+
+class SegmentRecorder:
+    """
+    Stream-copies a camera into rolling, time-segmented files for audits.
+
+    FFmpeg runs with `-c copy`, so packets are remuxed as they arrive and
+    never decoded or re-encoded; the Python process spends no CPU on it.
+    FFmpeg's segment muxer appends one CSV line per finished segment
+    (file, start, end in stream seconds); the recorder turns those into an
+    index of wall-clock ranges that lines up with StreamProcessor result
+    times, so `clip_for(result)` names the files (and in-file offsets)
+    covering an idle event.
+
+    If FFmpeg exits (camera reboot, network drop) the exit is logged and it
+    is restarted with exponential backoff (RESTART_BACKOFF doubling up to
+    RESTART_MAX_BACKOFF).  FFmpeg's own messages go to
+    `<prefix>_ffmpeg.log` in *out_dir*.
+
+    Raises:
+        ValueError: If *source* is not a stream URL (e.g. a camera index);
+                    FFmpeg cannot open what OpenCV opened by index.
+    """
+    def __init__(
+        self,
+        source: str,
+        out_dir: str,
+        segment_seconds: float = SEGMENT_SECONDS,
+        retention_seconds: Optional[float] = None,
+        prefix: str = "cam",
+        container: str = "mkv",
+        rtsp_transport: str = "tcp",
+        ffmpeg_bin: str = "ffmpeg",
+    ):
+        if not (isinstance(source, str) and "://" in source):
+            raise ValueError(f"SegmentRecorder needs a stream URL, got {source!r}.")
+        self.source            = source
+        self.out_dir           = out_dir
+        self.segment_seconds   = segment_seconds
+        self.retention_seconds = retention_seconds
+        self.prefix            = prefix
+        self.container         = container
+        self.rtsp_transport    = rtsp_transport
+        self.ffmpeg_bin        = ffmpeg_bin
+        self.list_path         = os.path.join(out_dir, f"{prefix}_segments.csv")
+        self.log_path          = os.path.join(out_dir, f"{prefix}_ffmpeg.log")
+        self.restarts: int     = 0
+
+        self.segments: List[Dict[str, Any]] = []
+        self._anchor: Optional[float] = None     # epoch time of stream second 0
+        self._lines_read: int = 0
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._log: Optional[Any] = None
+        self._started_at: float = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def command(self) -> List[str]:
+        pattern = os.path.join(
+            self.out_dir, f"{self.prefix}_{SEGMENT_TIME_FORMAT}.{self.container}"
+        )
+        cmd = [self.ffmpeg_bin, "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if str(self.source).startswith("rtsp://"):
+            cmd += ["-rtsp_transport", self.rtsp_transport]
+        cmd += [
+            "-i", str(self.source),
+            "-map", "0:v", "-c", "copy",
+            "-f", "segment",
+            "-segment_time", f"{self.segment_seconds:g}",
+            "-segment_list", self.list_path,
+            "-segment_list_type", "csv",
+            "-reset_timestamps", "1",
+            "-strftime", "1",
+            pattern,
+        ]
+        return cmd
+
+    def start(self) -> "SegmentRecorder":
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._stop.clear()
+        self._spawn()
+        self._thread = threading.Thread(
+            target=self._watch, name="SegmentRecorder", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _spawn(self) -> None:
+        if self._log is None:
+            self._log = open(self.log_path, "a")
+        try:
+            self._proc = subprocess.Popen(
+                self.command(), stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=self._log,
+            )
+        except OSError as exc:
+            print(f"[REC] Cannot start {self.ffmpeg_bin!r}: {exc}")
+            self._proc = None
+        self._started_at = time.time()
+
+    def _watch(self) -> None:
+        poll = min(5.0, self.segment_seconds / 2)
+        delay = RESTART_BACKOFF
+        while not self._stop.wait(poll):
+            self.refresh_index()
+            if self._proc is not None:
+                code = self._proc.poll()
+                if code is None:
+                    if time.time() - self._started_at > RESTART_MAX_BACKOFF:
+                        delay = RESTART_BACKOFF     # healthy again
+                    continue
+                print(
+                    f"[REC] FFmpeg exited with code {code}; restarting in "
+                    f"{delay:.1f}s (see {self.log_path})."
+                )
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, RESTART_MAX_BACKOFF)
+            # The new run rewrites the segment list and its stream clock
+            # starts again at 0, so re-anchor on its first file
+            self.refresh_index()
+            with self._lock:
+                self._lines_read = 0
+                self._anchor = None
+            try:
+                os.remove(self.list_path)
+            except OSError:
+                pass
+            self.restarts += 1
+            self._spawn()
+
+    def refresh_index(self) -> List[Dict[str, Any]]:
+        """
+        Pick up segments FFmpeg has finished since the last call and prune
+        those older than *retention_seconds*.
+        """
+        if not os.path.exists(self.list_path):
+            return self.segments
+
+        with open(self.list_path, newline="") as fh:
+            rows = list(csv.reader(fh))
+
+        with self._lock:
+            for name, start, end in (r[:3] for r in rows[self._lines_read:] if len(r) >= 3):
+                path = os.path.join(self.out_dir, name)
+                if self._anchor is None:
+                    self._anchor = self._file_epoch(name) - float(start)
+                self.segments.append({
+                    "path":       path,
+                    "time_start": self._anchor + float(start),
+                    "time_end":   self._anchor + float(end),
+                })
+            self._lines_read = len(rows)
+
+            if self.retention_seconds is not None:
+                cutoff = time.time() - self.retention_seconds
+                while self.segments and self.segments[0]["time_end"] < cutoff:
+                    old = self.segments.pop(0)
+                    try:
+                        os.remove(old["path"])
+                    except OSError:
+                        pass
+            return list(self.segments)
+
+    def _file_epoch(self, name: str) -> float:
+        stamp = os.path.splitext(name)[0][len(self.prefix) + 1:]
+        try:
+            return time.mktime(time.strptime(stamp, SEGMENT_TIME_FORMAT))
+        except ValueError:
+            return os.path.getmtime(os.path.join(self.out_dir, name)) - self.segment_seconds
+
+    def segments_between(
+        self, time_start: float, time_end: float
+    ) -> List[Tuple[str, float, float]]:
+        """
+        Map a wall-clock range onto recorded files.
+
+        Returns:
+            List[Tuple[str, float, float]]: (path, offset_start, offset_end) per
+                overlapping segment, offsets in seconds from the file start
+                (ready for `ffmpeg -ss offset_start -to offset_end -i path`).
+        """
+        with self._lock:
+            return [
+                (
+                    seg["path"],
+                    max(0.0, time_start - seg["time_start"]),
+                    min(seg["time_end"], time_end) - seg["time_start"],
+                )
+                for seg in self.segments
+                if seg["time_end"] > time_start and seg["time_start"] < time_end
+            ]
+
+    def clip_for(
+        self, result: Dict[str, Any], padding: float = 2.0
+    ) -> List[Tuple[str, float, float]]:
+        """
+        Files covering a StreamProcessor result's time_start / time_end.
+        """
+        return self.segments_between(
+            result["time_start"] - padding, result["time_end"] + padding
+        )
+
+    def stop(self) -> None:
+        # Join the watcher first so it cannot restart FFmpeg behind us
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._proc is not None:
+            self._proc.terminate()      # lets FFmpeg close the open segment
+            try:
+                self._proc.wait(timeout=5.0)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+            self._proc = None
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self.refresh_index()
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from bench_allocations import measure, sample_frames
+
+LIMIT_BYTES = 64 * 1024          # a 1440p BGR frame is ~11 MB; buffers must be reused
+FRAME_SIZE  = (2560, 1440)
+
+
+class NoHands:
+    """Stand-in for mp.solutions.hands.Hands that never finds a hand."""
+    def process(self, rgb: np.ndarray) -> SimpleNamespace:
+        return SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize("roi, target_resolution", [
+    (None, None),
+    ((600, 300, 900, 700), None),
+    (None, (640, 360)),
+    ((600, 300, 900, 700), (320, 240)),
+])
+def test_no_large_allocations_per_sample(roi, target_resolution):
+    frames = sample_frames(None, FRAME_SIZE, 4)
+    result = measure(frames, 20, roi, target_resolution, hands=NoHands())
+    peaks = result["peaks"]
+    assert len(peaks) == 20
+    assert peaks.max() < LIMIT_BYTES, (
+        f"a sample allocated {peaks.max()} bytes (frame is {result['frame_bytes']})"
+    )
@@ -0,0 +1,538 @@
+import importlib
+import math
+import os
+from itertools import groupby
+from typing import Any, List, Optional, Sequence, Tuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from landmarks import Detection, LandmarkProvider
+from live import (
+    HANDEDNESS_ROW,
+    MIDDLE_KNUCKLE_IDX,
+    NUM_LANDMARKS,
+    alloc_hand_landmarks,
+    crop_roi,
+    hand_detection,
+)
+
+# The .tflite files shipped inside the mediapipe wheel, by model_complexity
+MEDIAPIPE_MODULES: str = os.path.join(os.path.dirname(mp.__file__), "modules")
+PALM_MODELS = {
+    0: os.path.join(MEDIAPIPE_MODULES, "palm_detection", "palm_detection_lite.tflite"),
+    1: os.path.join(MEDIAPIPE_MODULES, "palm_detection", "palm_detection_full.tflite"),
+}
+LANDMARK_MODELS = {
+    0: os.path.join(MEDIAPIPE_MODULES, "hand_landmark", "hand_landmark_lite.tflite"),
+    1: os.path.join(MEDIAPIPE_MODULES, "hand_landmark", "hand_landmark_full.tflite"),
+}
+# Outputs used, as (tensor name, values per batch item) in the order _Model.run
+# returns them: palm box regressors and scores; screen landmarks, hand
+# presence and "Left" score (the world landmarks, Identity_3, are unused)
+PALM_OUTPUTS     = (("Identity", 2016 * 18), ("Identity_1", 2016))
+LANDMARK_OUTPUTS = (("Identity", 63), ("Identity_1", 1), ("Identity_2", 1))
+# Interpreter packages tried in order; any one of them can run the models
+INTERPRETER_MODULES = (
+    "tflite_runtime.interpreter",
+    "ai_edge_litert.interpreter",
+    "tensorflow.lite.python.interpreter",
+)
+
+# Parameters of MediaPipe's hand_landmark_tracking_cpu graph
+PALM_INPUT_SIZE: int          = 192
+PALM_ANCHOR_STRIDES           = (8, 16, 16, 16)
+PALM_NUM_KEYPOINTS: int       = 7
+PALM_NMS_THRESHOLD: float     = 0.3
+PALM_RECT_SCALE: float        = 2.6    # palm box → hand crop
+PALM_RECT_SHIFT_Y: float      = -0.5
+LANDMARK_INPUT_SIZE: int      = 224
+LANDMARK_Z_SCALE: float       = 0.4    # TensorsToLandmarks normalize_z
+HAND_RECT_SCALE: float        = 2.0    # landmarks → next frame's hand crop
+HAND_RECT_SHIFT_Y: float      = -0.1
+# Landmarks that stay put while the fingers move (wrist, thumb base, the
+# first two joints of each finger); the tracking rect is fitted to these
+HAND_RECT_LANDMARKS = [0, 1, 2, 3, 5, 6, 9, 10, 13, 14, 17, 18]
+
+# Columns of a decoded palm row: box (x_center, y_center, w, h), then 7 (x, y) keypoints
+_PALM_X_COLS = [0] + list(range(4, 4 + 2 * PALM_NUM_KEYPOINTS, 2))
+_PALM_Y_COLS = [1] + list(range(5, 5 + 2 * PALM_NUM_KEYPOINTS, 2))
+
+# A hand rect is (x_center_px, y_center_px, size_px, rotation_rad): a square
+# in frame pixels, rotated so that the hand points up in the crop
+HandRect = np.ndarray
+
+
+def load_interpreter(model_path: str, num_threads: Optional[int] = None) -> Any:
+    """
+    Open *model_path* with the first TFLite interpreter package installed
+    (tflite-runtime, ai-edge-litert or tensorflow).
+
+    Raises:
+        RuntimeError: If none of them is installed.
+    """
+    for module in INTERPRETER_MODULES:
+        try:
+            interpreter_class = importlib.import_module(module).Interpreter
+        except ImportError:
+            continue
+        return interpreter_class(model_path=model_path, num_threads=num_threads)
+    raise RuntimeError(
+        "No TFLite interpreter found; install tflite-runtime or ai-edge-litert."
+    )
+
+
+def _anchor_layers(input_size: int, strides: Sequence[int]) -> List[Tuple[int, int]]:
+    # (cells per side, anchors per cell) of each detector head; consecutive
+    # layers with the same stride share one head and add two anchors each
+    return [
+        (math.ceil(input_size / stride), 2 * len(list(layers)))
+        for stride, layers in groupby(strides)
+    ]
+
+
+def ssd_anchors(
+    input_size: int = PALM_INPUT_SIZE, strides: Sequence[int] = PALM_ANCHOR_STRIDES
+) -> np.ndarray:
+    """
+    Anchor centres of the palm detector, (N, 2) normalised (x, y).
+
+    Same layout as MediaPipe's SsdAnchorsCalculator for the palm models.
+    All anchors are 1×1 (fixed_anchor_size), so only the centres matter.
+    """
+    centres = []
+    for cells, per_cell in _anchor_layers(input_size, strides):
+        grid = (np.arange(cells, dtype=np.float32) + 0.5) / cells
+        ys, xs = np.meshgrid(grid, grid, indexing="ij")
+        cell_centres = np.stack([xs.ravel(), ys.ravel()], axis=1)
+        centres.append(np.repeat(cell_centres, per_cell, axis=0))
+    return np.concatenate(centres)
+
+
+def unfold_palm_batch(output: np.ndarray, batch: int) -> np.ndarray:
+    """
+    (batch, N, k) view of a palm detector output.
+
+    The palm models reshape each head's output to (1, -1, k) before
+    concatenating them, so a batched invoke returns every frame's anchors of
+    the first head, then every frame's anchors of the next, all in one
+    (1, batch * N, k) tensor.
+    """
+    k = output.shape[-1]
+    if output.shape[0] == batch:
+        return output.reshape(batch, -1, k)
+    flat = output.reshape(-1, k)
+    heads, start = [], 0
+    for cells, per_cell in _anchor_layers(PALM_INPUT_SIZE, PALM_ANCHOR_STRIDES):
+        size = batch * cells * cells * per_cell
+        heads.append(flat[start:start + size].reshape(batch, -1, k))
+        start += size
+    return np.concatenate(heads, axis=1)
+
+
+def decode_palms(
+    raw_boxes: np.ndarray, raw_scores: np.ndarray, anchors: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode a batch of palm detector outputs against *anchors*.
+
+    Args:
+        raw_boxes (np.ndarray): (B, N, 18) regressor output.
+        raw_scores (np.ndarray): (B, N) score logits.
+        anchors (np.ndarray): (N, 2) from ssd_anchors.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (B, N, 18) boxes and keypoints in
+            normalised input-tensor coordinates, and (B, N) scores in [0, 1].
+    """
+    boxes = raw_boxes / np.float32(PALM_INPUT_SIZE)
+    boxes[..., _PALM_X_COLS] += anchors[:, :1]
+    boxes[..., _PALM_Y_COLS] += anchors[:, 1:]
+    scores = 1.0 / (1.0 + np.exp(-np.clip(raw_scores, -100.0, 100.0)))
+    return boxes, scores
+
+
+def weighted_nms(
+    boxes: np.ndarray, scores: np.ndarray, threshold: float = PALM_NMS_THRESHOLD
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    MediaPipe's weighted non-maximum suppression.
+
+    Takes the best remaining detection, averages it with every remaining
+    detection overlapping it by more than *threshold* IoU (weighted by
+    score, keypoints included), and repeats on the rest.
+
+    Args:
+        boxes (np.ndarray): (n, 18) rows as returned by decode_palms.
+        scores (np.ndarray): (n,) scores.
+        threshold (float): IoU above which detections are merged.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Merged rows and their scores, best first.
+    """
+    order = np.argsort(-scores)
+    boxes, scores = boxes[order], scores[order]
+    half = boxes[:, 2:4] / 2
+    lo, hi = boxes[:, :2] - half, boxes[:, :2] + half
+    area = np.prod(hi - lo, axis=1)
+
+    merged, merged_scores = [], []
+    remaining = np.arange(len(boxes))
+    while remaining.size:
+        top = remaining[0]
+        inter = np.clip(
+            np.minimum(hi[top], hi[remaining]) - np.maximum(lo[top], lo[remaining]), 0, None
+        ).prod(axis=1)
+        union = area[top] + area[remaining] - inter
+        overlap = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0) > threshold
+        overlap[0] = True
+        group = remaining[overlap]
+        weights = scores[group]
+        merged.append(weights @ boxes[group] / weights.sum())
+        merged_scores.append(scores[top])
+        remaining = remaining[~overlap]
+    return np.asarray(merged).reshape(-1, boxes.shape[1]), np.asarray(merged_scores)
+
+
+def _normalize_radians(angle: float) -> float:
+    return angle - 2 * math.pi * math.floor((angle + math.pi) / (2 * math.pi))
+
+
+def _rotation(start: np.ndarray, end: np.ndarray) -> float:
+    # Rotation that turns the start → end direction straight up in the crop
+    return _normalize_radians(
+        math.pi / 2 - math.atan2(-(end[1] - start[1]), end[0] - start[0])
+    )
+
+
+def _transform_rect(
+    cx: float, cy: float, width: float, height: float, rotation: float,
+    scale: float, shift_y: float,
+) -> HandRect:
+    # RectTransformationCalculator: shift along the rotated y axis, square
+    # on the long side, enlarge
+    cx -= height * shift_y * math.sin(rotation)
+    cy += height * shift_y * math.cos(rotation)
+    return np.array([cx, cy, max(width, height) * scale, rotation])
+
+
+def palm_to_rect(palm: np.ndarray) -> HandRect:
+    """
+    Hand crop for a palm detection (one decode_palms row in frame pixels):
+    rotated from the wrist keypoint (0) to the middle finger's base (2),
+    then grown to cover the fingers.
+    """
+    rotation = _rotation(palm[4:6], palm[8:10])
+    return _transform_rect(
+        palm[0], palm[1], palm[2], palm[3], rotation, PALM_RECT_SCALE, PALM_RECT_SHIFT_Y
+    )
+
+
+def landmarks_to_rect(points: np.ndarray) -> HandRect:
+    """
+    Hand crop for the next frame from this frame's (21, 2+) landmarks in
+    frame pixels, as MediaPipe tracks a hand without re-running the palm
+    detector.
+    """
+    points = points[:, :2].astype(np.float64)
+    knuckles = ((points[5] + points[13]) / 2 + points[9]) / 2
+    rotation = _rotation(points[0], knuckles)
+
+    stable = points[HAND_RECT_LANDMARKS]
+    centre = (stable.max(axis=0) + stable.min(axis=0)) / 2
+    c, s = math.cos(rotation), math.sin(rotation)
+    d = stable - centre
+    # Bounding box in the hand's own orientation
+    projected = np.stack([d[:, 0] * c + d[:, 1] * s, d[:, 1] * c - d[:, 0] * s], axis=1)
+    (px, py), (width, height) = (
+        (projected.max(axis=0) + projected.min(axis=0)) / 2,
+        projected.max(axis=0) - projected.min(axis=0),
+    )
+    return _transform_rect(
+        centre[0] + px * c - py * s, centre[1] + px * s + py * c, width, height,
+        rotation, HAND_RECT_SCALE, HAND_RECT_SHIFT_Y,
+    )
+
+
+def _rect_matrix(rect: HandRect, size: int) -> np.ndarray:
+    # Affine map from crop pixels to frame pixels (for WARP_INVERSE_MAP)
+    cx, cy, side, rotation = rect
+    c, s = math.cos(rotation), math.sin(rotation)
+    k = side / size
+    return np.array([
+        [c * k, -s * k, cx - side / 2 * (c - s)],
+        [s * k,  c * k, cy - side / 2 * (s + c)],
+    ])
+
+
+class _Model:
+    """
+    A TFLite interpreter whose batch dimension follows the input, resized
+    only when the batch size changes.  `run` returns the *outputs*, looked
+    up by tensor name and checked against their size, in the given order.
+
+    Raises:
+        ValueError: If the model lacks one of *outputs* or its size differs
+                    (a different model release than this code expects).
+    """
+    def __init__(
+        self, path: str, num_threads: Optional[int], outputs: Sequence[Tuple[str, int]]
+    ):
+        self.interpreter = load_interpreter(path, num_threads)
+        self.interpreter.allocate_tensors()
+        details = self.interpreter.get_input_details()[0]
+        self.input_index = details["index"]
+        self.batch = int(details["shape"][0])
+
+        by_name = {d["name"]: d for d in self.interpreter.get_output_details()}
+        self.output_indices = []
+        for name, size in outputs:
+            d = by_name.get(name)
+            if d is None or int(np.prod(d["shape"][1:])) != size:
+                found = {n: tuple(int(x) for x in o["shape"]) for n, o in by_name.items()}
+                raise ValueError(
+                    f"{os.path.basename(path)}: expected output {name!r} with "
+                    f"{size} values per item, model has {found}."
+                )
+            self.output_indices.append(d["index"])
+
+    def run(self, batch: np.ndarray) -> List[np.ndarray]:
+        if len(batch) != self.batch:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self.batch = len(batch)
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return [self.interpreter.get_tensor(i) for i in self.output_indices]
+
+
+class TFLiteHandsProvider(LandmarkProvider):
+    """
+    MediaPipe's hand pipeline run directly on the palm detection and hand
+    landmark .tflite models bundled with the mediapipe package, batched
+    across cameras.
+
+    Position i of *frames* in process_batch is camera i.  Each camera keeps
+    a hand rect between calls, as MediaPipe Hands does when tracking: a
+    camera whose hand was found last time is cropped around that hand and
+    skips palm detection.  The cameras that need detection go through the
+    palm model in one invoke; every camera with a rect then goes through the
+    landmark model in one invoke.  Anchors, box decoding and NMS are numpy,
+    and only one hand (the best palm) is kept per camera.
+
+    Needs a TFLite interpreter package (see load_interpreter).
+
+    Args:
+        model_complexity (int): 0 for the lite models, 1 for the full ones.
+        min_detection_confidence (float): Palm score threshold.
+        min_tracking_confidence (float): Hand presence threshold of the
+                                         landmark model.
+        landmark_idx (int): Landmark reported as the knuckle.
+        num_threads (Optional[int]): Interpreter threads (None = its default).
+
+    Raises:
+        ValueError: If a bundled model's outputs are not the ones expected
+                    (PALM_OUTPUTS / LANDMARK_OUTPUTS).
+    """
+    name = "tflite"
+
+    def __init__(
+        self,
+        model_complexity: int = 0,
+        min_detection_confidence: float = 0.7,
+        min_tracking_confidence: float = 0.5,
+        landmark_idx: int = MIDDLE_KNUCKLE_IDX,
+        num_threads: Optional[int] = None,
+    ):
+        self.name = f"tflite/c={model_complexity}"
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence  = min_tracking_confidence
+        self.landmark_idx             = landmark_idx
+
+        self.palm_model     = _Model(PALM_MODELS[model_complexity], num_threads, PALM_OUTPUTS)
+        self.landmark_model = _Model(
+            LANDMARK_MODELS[model_complexity], num_threads, LANDMARK_OUTPUTS
+        )
+        self.anchors        = ssd_anchors()
+
+        self.rects: List[Optional[HandRect]] = []
+        self.landmarks = alloc_hand_landmarks(1)
+        # Reused warp targets and model input batches
+        self._palm_image     = np.empty((PALM_INPUT_SIZE, PALM_INPUT_SIZE, 3), dtype=np.uint8)
+        self._landmark_image = np.empty((LANDMARK_INPUT_SIZE, LANDMARK_INPUT_SIZE, 3), dtype=np.uint8)
+        self._palm_batch     = np.empty((0, PALM_INPUT_SIZE, PALM_INPUT_SIZE, 3), dtype=np.float32)
+        self._landmark_batch = np.empty((0, LANDMARK_INPUT_SIZE, LANDMARK_INPUT_SIZE, 3), dtype=np.float32)
+
+    def process(
+        self,
+        frame: np.ndarray,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        target_resolution: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Detection]:
+        return self.process_batch([frame], [roi])[0]
+
+    def process_batch(
+        self,
+        frames: Sequence[Optional[np.ndarray]],
+        rois: Optional[Sequence[Optional[Tuple[int, int, int, int]]]] = None,
+        target_resolution: Optional[Tuple[int, int]] = None,
+    ) -> List[Optional[Detection]]:
+        """
+        Detect the hand of every camera at once.  *frames* may contain None
+        for cameras without a frame this round; *target_resolution* is
+        ignored (the models have fixed input sizes).
+        """
+        hands = self.process_hands(frames, rois)
+        return [
+            None if np.isnan(hand[0, 0]) else hand_detection(hand, self.landmark_idx)
+            for hand in hands
+        ]
+
+    def process_hands(
+        self,
+        frames: Sequence[Optional[np.ndarray]],
+        rois: Optional[Sequence[Optional[Tuple[int, int, int, int]]]] = None,
+    ) -> np.ndarray:
+        """
+        Like process_batch, but return all 21 landmarks of each camera's hand.
+
+        Args:
+            frames (Sequence[Optional[np.ndarray]]): One BGR frame (or None)
+                per camera.
+            rois (Optional[Sequence[Optional[Tuple[int, int, int, int]]]]):
+                Per-camera workstation region; palms are searched for inside
+                it, and a hand whose knuckle leaves it is dropped.
+
+        Returns:
+            np.ndarray: (len(frames), 22, 3) in the alloc_hand_landmarks
+                layout, one row per camera, NaN where no hand was found.
+                The array is reused by the next call.
+        """
+        n = len(frames)
+        rois = rois if rois is not None else [None] * n
+        if len(self.rects) < n:
+            self.rects.extend([None] * (n - len(self.rects)))
+        if len(self.landmarks) < n:
+            self.landmarks = alloc_hand_landmarks(n)
+        out = self.landmarks[:n]
+        out[:] = np.nan
+
+        for i in range(n):
+            if frames[i] is None:
+                self.rects[i] = None
+        detect = [i for i in range(n) if frames[i] is not None and self.rects[i] is None]
+        if detect:
+            rects = self._detect_palms([frames[i] for i in detect], [rois[i] for i in detect])
+            for i, rect in zip(detect, rects):
+                self.rects[i] = rect
+
+        track = [i for i in range(n) if frames[i] is not None and self.rects[i] is not None]
+        if not track:
+            return out
+        points, presence, left = self._run_landmarks(
+            [frames[i] for i in track], np.array([self.rects[i] for i in track])
+        )
+        for j, i in enumerate(track):
+            knuckle = points[j, self.landmark_idx]
+            if presence[j] < self.min_tracking_confidence or not _inside(knuckle, rois[i]):
+                self.rects[i] = None
+                continue
+            out[i, :NUM_LANDMARKS] = points[j]
+            # Binary handedness: the model scores "Left"
+            out[i, HANDEDNESS_ROW] = (left[j] < 0.5, max(left[j], 1.0 - left[j]), 0.0)
+            self.rects[i] = landmarks_to_rect(points[j])
+        return out
+
+    def _detect_palms(
+        self,
+        frames: Sequence[np.ndarray],
+        rois: Sequence[Optional[Tuple[int, int, int, int]]],
+    ) -> List[Optional[HandRect]]:
+        n = len(frames)
+        batch = self._batch("_palm_batch", n)
+        # Per frame: tensor pixels → frame pixels is p * scale + (x_offset, y_offset)
+        mapping = np.empty((n, 3))
+        for j, (frame, roi) in enumerate(zip(frames, rois)):
+            crop, x0, y0 = crop_roi(frame, roi)
+            h, w = crop.shape[:2]
+            # Letterboxed into the square input, zero borders, as MediaPipe does
+            scale = PALM_INPUT_SIZE / max(w, h)
+            ox, oy = (PALM_INPUT_SIZE - w * scale) / 2, (PALM_INPUT_SIZE - h * scale) / 2
+            cv2.warpAffine(
+                crop, np.array([[scale, 0, ox], [0, scale, oy]]),
+                (PALM_INPUT_SIZE, PALM_INPUT_SIZE), dst=self._palm_image,
+                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0,
+            )
+            _to_tensor(self._palm_image, batch[j])
+            mapping[j] = (1 / scale, x0 - ox / scale, y0 - oy / scale)
+
+        raw_boxes, raw_scores = self.palm_model.run(batch)
+        boxes, scores = decode_palms(
+            unfold_palm_batch(raw_boxes, n), unfold_palm_batch(raw_scores, n)[..., 0],
+            self.anchors,
+        )
+
+        rects: List[Optional[HandRect]] = []
+        for j in range(n):
+            keep = scores[j] >= self.min_detection_confidence
+            if not keep.any():
+                rects.append(None)
+                continue
+            palms, _ = weighted_nms(boxes[j, keep], scores[j, keep])
+            palm = palms[0].astype(np.float64) * (PALM_INPUT_SIZE * mapping[j, 0])
+            palm[_PALM_X_COLS] += mapping[j, 1]
+            palm[_PALM_Y_COLS] += mapping[j, 2]
+            rects.append(palm_to_rect(palm))
+        return rects
+
+    def _run_landmarks(
+        self, frames: Sequence[np.ndarray], rects: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (m, 21, 3) landmarks in frame pixels (z scaled like x), hand
+        # presence and "Left" score for each rect
+        m = len(frames)
+        batch = self._batch("_landmark_batch", m)
+        for j, (frame, rect) in enumerate(zip(frames, rects)):
+            cv2.warpAffine(
+                frame, _rect_matrix(rect, LANDMARK_INPUT_SIZE),
+                (LANDMARK_INPUT_SIZE, LANDMARK_INPUT_SIZE), dst=self._landmark_image,
+                flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE,
+            )
+            _to_tensor(self._landmark_image, batch[j])
+
+        raw, presence, left = self.landmark_model.run(batch)
+        raw = raw.reshape(m, NUM_LANDMARKS, 3) / LANDMARK_INPUT_SIZE
+        side = rects[:, 2:3]
+        c, s = np.cos(rects[:, 3:4]), np.sin(rects[:, 3:4])
+        x, y = raw[..., 0] - 0.5, raw[..., 1] - 0.5
+        points = np.stack([
+            rects[:, 0:1] + side * (c * x - s * y),
+            rects[:, 1:2] + side * (s * x + c * y),
+            side * raw[..., 2] / LANDMARK_Z_SCALE,
+        ], axis=-1).astype(np.float32)
+        return points, presence.reshape(m), left.reshape(m)
+
+    def _batch(self, attr: str, n: int) -> np.ndarray:
+        # First n slots of a float32 input batch, grown (never shrunk) on demand
+        buf = getattr(self, attr)
+        if len(buf) < n:
+            buf = np.empty((n,) + buf.shape[1:], dtype=np.float32)
+            setattr(self, attr, buf)
+        return buf[:n]
+
+    def reset(self) -> None:
+        """Forget tracked hands, e.g. after a camera switch."""
+        self.rects = []
+
+
+def _to_tensor(image: np.ndarray, out: np.ndarray) -> None:
+    # BGR uint8 → RGB float32 in [0, 1]
+    np.multiply(image[..., ::-1], np.float32(1 / 255), out=out)
+
+
+def _inside(point: np.ndarray, roi: Optional[Tuple[int, int, int, int]]) -> bool:
+    if roi is None:
+        return True
+    x, y, w, h = roi
+    return x <= point[0] < x + w and y <= point[1] < y + h